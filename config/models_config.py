@@ -1,32 +1,44 @@
-from typing import Dict, Any, List
+from dataclasses import dataclass
+from typing import Dict, Any, List, Tuple
+from data.data_structures import DATACLASS_OPTIONS
+
+
+@dataclass(frozen=True, **DATACLASS_OPTIONS)
+class ModelConfig:
+    name: str
+    max_tokens: int
+    cost_per_token: float
+    speed_score: int
+    quality_score: int
+    suitable_complexity: Tuple[int, ...]
 
 
 class ModelsConfig:
-    AVAILABLE_MODELS = {
-        "qwen-turbo": {
-            "name": "qwen-turbo",
-            "max_tokens": 8000,
-            "cost_per_token": 0.001,
-            "speed_score": 9,
-            "quality_score": 6,
-            "suitable_complexity": [0, 1, 2]
-        },
-        "qwen-plus": {
-            "name": "qwen-plus",
-            "max_tokens": 32000,
-            "cost_per_token": 0.002,
-            "speed_score": 7,
-            "quality_score": 8,
-            "suitable_complexity": [2, 3, 4]
-        },
-        "qwen-max": {
-            "name": "qwen-max",
-            "max_tokens": 128000,
-            "cost_per_token": 0.005,
-            "speed_score": 5,
-            "quality_score": 10,
-            "suitable_complexity": [3, 4, 5]
-        }
+    AVAILABLE_MODELS: Dict[str, ModelConfig] = {
+        "qwen-turbo": ModelConfig(
+            name="qwen-turbo",
+            max_tokens=8000,
+            cost_per_token=0.001,
+            speed_score=9,
+            quality_score=6,
+            suitable_complexity=(0, 1, 2)
+        ),
+        "qwen-plus": ModelConfig(
+            name="qwen-plus",
+            max_tokens=32000,
+            cost_per_token=0.002,
+            speed_score=7,
+            quality_score=8,
+            suitable_complexity=(2, 3, 4)
+        ),
+        "qwen-max": ModelConfig(
+            name="qwen-max",
+            max_tokens=128000,
+            cost_per_token=0.005,
+            speed_score=5,
+            quality_score=10,
+            suitable_complexity=(3, 4, 5)
+        )
     }
 
     MODEL_SELECTION_RULES = {
@@ -32,7 +32,6 @@ class AdvancedProcessingPipeline:
     async def execute_pipeline(self, question: str, route_config: Dict[str, Any],
                                context: Dict[str, Any]) -> ProcessingResult:
         pipeline_state = PipelineState(question, route_config, context)
-        start_time = time.time()
 
         try:
             for stage_name in route_config['stages']:
@@ -41,22 +40,20 @@ class AdvancedProcessingPipeline:
                 else:
                     pipeline_state.add_error(f"Unknown stage: {stage_name}")
 
-            result = pipeline_state.get_final_result()
-            result.processing_time = time.time() - start_time
-            return result
+            return pipeline_state.get_final_result()
 
         except Exception as e:
-            return self._handle_pipeline_failure(pipeline_state, e, time.time() - start_time)
+            return self._handle_pipeline_failure(pipeline_state, e, time.monotonic() - pipeline_state.start_time)
 
     def _handle_pipeline_failure(self, pipeline_state: PipelineState, error: Exception,
                                  processing_time: float) -> ProcessingResult:
-        result = ProcessingResult()
-        result.response = f"处理过程中出现错误: {str(error)}"
-        result.success = False
-        result.error = str(error)
-        result.processing_time = processing_time
-        result.confidence = 0.0
-        return result
+        return ProcessingResult(
+            response=f"处理过程中出现错误: {str(error)}",
+            success=False,
+            error=str(error),
+            processing_time=processing_time,
+            confidence=0.0
+        )
 
 
 class PreprocessingStage:
@@ -1,15 +1,44 @@
 import asyncio
-from typing import Dict, Any, List
+from functools import cached_property
+from typing import Dict, Any, List, FrozenSet
+import jieba
 from data.data_structures import ValidationResult
 
+# function words (including the fact indicators themselves) that appear in almost any source text
+_FACT_STOPWORDS = frozenset([
+    '的', '了', '是', '为', '有', '在', '和', '与', '及', '或', '也', '都', '就', '而', '这', '那', '之', '其',
+    '一个', '我们', '你', '我', '他', '她', '它', '对', '把', '被', '从', '到', '以', '等', '并', '但', '很',
+    '更', '最', '约', '达到', '可以', '会', '能', '将', '要', '不', '没有', '因为', '所以', '由于', '如果',
+    'the', 'a', 'an', 'is', 'are', 'of', 'and', 'or', 'to', 'in', 'on', 'for'
+])
+
+
+def _content_tokens(text: str) -> List[str]:
+    # drops whitespace, punctuation-only tokens and stopwords
+    return [token for token in jieba.lcut(text)
+            if token not in _FACT_STOPWORDS and any(char.isalnum() for char in token)]
+
 
 class AdaptiveQualityController:
-    def __init__(self):
-        self.quality_metrics = QualityMetrics()
-        self.confidence_calculator = ConfidenceCalculator()
-        self.fact_checker = FactChecker()
-        self.consistency_verifier = ConsistencyVerifier()
-        self.completeness_assessor = CompletenessAssessor()
+    @cached_property
+    def quality_metrics(self) -> 'QualityMetrics':
+        return QualityMetrics()
+
+    @cached_property
+    def confidence_calculator(self) -> 'ConfidenceCalculator':
+        return ConfidenceCalculator()
+
+    @cached_property
+    def fact_checker(self) -> 'FactChecker':
+        return FactChecker()
+
+    @cached_property
+    def consistency_verifier(self) -> 'ConsistencyVerifier':
+        return ConsistencyVerifier()
+
+    @cached_property
+    def completeness_assessor(self) -> 'CompletenessAssessor':
+        return CompletenessAssessor()
 
     async def validate_response(self, question: str, response: str,
                                 processing_context: Dict[str, Any]) -> ValidationResult:
@@ -141,20 +170,26 @@ class ConfidenceCalculator:
 
 
 class FactChecker:
+    SOURCE_SCAN_LIMIT = 8192
+
     async def verify_facts(self, response: str, knowledge_sources: List[Dict[str, Any]]) -> float:
         if not knowledge_sources:
             return 0.5
 
         fact_statements = self._extract_fact_statements(response)
-        verified_count = 0
+        if not fact_statements:
+            return 0.8
 
+        source_token_sets = [
+            self._tokenize(source.get('content', '')[:self.SOURCE_SCAN_LIMIT])
+            for source in knowledge_sources
+        ]
+
+        verified_count = 0
         for statement in fact_statements:
-            if await self._verify_statement(statement, knowledge_sources):
+            if self._verify_statement(statement, source_token_sets):
                 verified_count += 1
 
-        if not fact_statements:
-            return 0.8
-
         return verified_count / len(fact_statements)
 
     def _extract_fact_statements(self, response: str) -> List[str]:
@@ -167,11 +202,14 @@ class FactChecker:
 
         return fact_statements
 
-    async def _verify_statement(self, statement: str, knowledge_sources: List[Dict[str, Any]]) -> bool:
-        for source in knowledge_sources:
-            if any(word in source.get('content', '') for word in statement.split()[:3]):
-                return True
-        return False
+    def _tokenize(self, text: str) -> FrozenSet[str]:
+        return frozenset(_content_tokens(text))
+
+    def _verify_statement(self, statement: str, source_token_sets: List[FrozenSet[str]]) -> bool:
+        statement_tokens = frozenset(_content_tokens(statement)[:3])
+        if not statement_tokens:
+            return False
+        return any(not statement_tokens.isdisjoint(source_tokens) for source_tokens in source_token_sets)
 
 
 class ConsistencyVerifier:
@@ -1,8 +1,12 @@
 import asyncio
+from collections import OrderedDict
 from typing import Dict, Any, List, Tuple
 from utils.metrics import PerformanceOptimizer, ResourceManager, QualityPredictor
 from data.data_structures import ProcessingRoute, RouteEvaluation
 
+# quality, time, cost, risk, satisfaction
+OVERALL_SCORE_WEIGHTS = (0.3, 0.25, 0.2, 0.1, 0.15)
+
 
 class IntelligentRoutingEngine:
     def __init__(self):
@@ -10,6 +14,8 @@ class IntelligentRoutingEngine:
         self.performance_optimizer = PerformanceOptimizer()
         self.resource_manager = ResourceManager()
         self.quality_predictor = QualityPredictor()
+        self.evaluation_cache: OrderedDict = OrderedDict()
+        self.evaluation_cache_size = 1024
 
     def _initialize_route_templates(self) -> Dict[str, ProcessingRoute]:
         return {
@@ -44,6 +50,9 @@ class IntelligentRoutingEngine:
                                          system_status: Dict[str, Any]) -> ProcessingRoute:
         candidate_routes = self._generate_candidate_routes(classification_result)
 
+        if len(candidate_routes) == 1:
+            return self._build_processing_pipeline(candidate_routes[0], classification_result)
+
         evaluated_routes = []
         for route in candidate_routes:
             evaluation = await self._evaluate_route(route, classification_result, system_status)
@@ -78,6 +87,28 @@ class IntelligentRoutingEngine:
 
     async def _evaluate_route(self, route: ProcessingRoute, classification_result: Dict[str, Any],
                               system_status: Dict[str, Any]) -> RouteEvaluation:
+        # route.context is left out of the key: it carries per-request data that never affects scoring
+        cache_key = (
+            route.route_key(),
+            classification_result.get('complexity_level', 2),
+            classification_result.get('expected_time', 15.0),
+            system_status.get('load_factor', 1.0)
+        )
+        evaluation = self.evaluation_cache.get(cache_key)
+        if evaluation is not None:
+            self.evaluation_cache.move_to_end(cache_key)
+            return evaluation
+
+        evaluation = await self._score_route(route, classification_result, system_status)
+
+        self.evaluation_cache[cache_key] = evaluation
+        if len(self.evaluation_cache) > self.evaluation_cache_size:
+            self.evaluation_cache.popitem(last=False)
+
+        return evaluation
+
+    async def _score_route(self, route: ProcessingRoute, classification_result: Dict[str, Any],
+                           system_status: Dict[str, Any]) -> RouteEvaluation:
         evaluation = RouteEvaluation()
 
         evaluation.predicted_quality = await self.quality_predictor.predict_quality(route, classification_result)
@@ -158,24 +189,16 @@ class IntelligentRoutingEngine:
         return min(satisfaction, 1.0)
 
     def _calculate_overall_score(self, evaluation: RouteEvaluation, classification_result: Dict[str, Any]) -> float:
-        weights = {
-            'quality': 0.3,
-            'time': 0.25,
-            'cost': 0.2,
-            'risk': 0.1,
-            'satisfaction': 0.15
-        }
-
-        score = (
-                evaluation.predicted_quality * weights['quality'] +
-                (1.0 - min(evaluation.estimated_time / 30.0, 1.0)) * weights['time'] +
-                (1.0 - min(evaluation.resource_cost, 1.0)) * weights['cost'] +
-                (1.0 - evaluation.risk_assessment) * weights['risk'] +
-                evaluation.user_satisfaction_prediction * weights['satisfaction']
+        quality_w, time_w, cost_w, risk_w, satisfaction_w = OVERALL_SCORE_WEIGHTS
+
+        return (
+                evaluation.predicted_quality * quality_w +
+                (1.0 - min(evaluation.estimated_time / 30.0, 1.0)) * time_w +
+                (1.0 - min(evaluation.resource_cost, 1.0)) * cost_w +
+                (1.0 - evaluation.risk_assessment) * risk_w +
+                evaluation.user_satisfaction_prediction * satisfaction_w
         )
 
-        return score
-
     def _select_model(self, route: ProcessingRoute, classification_result: Dict[str, Any]) -> str:
         complexity = classification_result['complexity_level']
         preference = route.model_preference
@@ -1,5 +1,6 @@
 import asyncio
 import time
+from dataclasses import replace
 from typing import Dict, Any, List, Optional
 from core.classifier import MultiDimensionalClassifier
 from core.router import IntelligentRoutingEngine
@@ -30,7 +31,7 @@ class UnifiedScheduler:
 
     async def process_question(self, question: str, user_context: Dict[str, Any],
                                conversation_history: List[Dict[str, Any]]) -> ProcessingResult:
-        start_time = time.time()
+        start_time = time.monotonic()
 
         try:
             classification = await self.classifier.classify_question(
@@ -40,22 +41,23 @@ class UnifiedScheduler:
             processing_route = await self.routing_engine.create_processing_pipeline(
                 classification, self._get_system_status()
             )
+            route_config = processing_route.to_dict()
 
             initial_result = await self.pipeline_executor.execute_pipeline(
-                question, processing_route.__dict__, user_context
+                question, route_config, user_context
             )
 
             validation_result = await self.quality_controller.validate_response(
-                question, initial_result.response, initial_result.__dict__
+                question, initial_result.response, initial_result.to_dict()
             )
 
             final_result = await self._handle_improvement_suggestions(
-                initial_result, validation_result, processing_route.__dict__
+                question, initial_result, validation_result, route_config
             )
 
             interaction_data = self._create_interaction_data(
-                question, classification, processing_route.__dict__, final_result,
-                time.time() - start_time
+                question, classification, route_config, final_result,
+                time.monotonic() - start_time
             )
 
             await self.learning_system.learn_from_interaction(interaction_data)
@@ -63,45 +65,46 @@ class UnifiedScheduler:
             return final_result
 
         except Exception as e:
-            return await self._handle_processing_error(question, e, user_context, time.time() - start_time)
+            return await self._handle_processing_error(question, e, user_context, time.monotonic() - start_time)
 
     def _get_system_status(self) -> Dict[str, Any]:
         current_status = self.performance_monitor.get_current_status()
         self.system_status.update(current_status)
         return self.system_status
 
-    async def _handle_improvement_suggestions(self, initial_result: ProcessingResult, validation_result,
-                                              processing_route: Dict[str, Any]) -> ProcessingResult:
+    async def _handle_improvement_suggestions(self, question: str, initial_result: ProcessingResult,
+                                              validation_result, processing_route: Dict[str, Any]) -> ProcessingResult:
         improvement_action = validation_result.improvement_action
 
         if improvement_action['action'] == 'approve':
-            initial_result.confidence = validation_result.confidence
-            return initial_result
+            return replace(initial_result, confidence=validation_result.confidence)
 
         elif improvement_action['action'] == 'enhance':
             enhanced_result = await self._enhance_response(initial_result, improvement_action['strategy'])
-            enhanced_result.confidence = validation_result.confidence
-            return enhanced_result
+            return replace(enhanced_result, confidence=validation_result.confidence)
 
         elif improvement_action['action'] == 'improve':
-            improved_result = await self._improve_response(initial_result, improvement_action['strategy'],
+            improved_result = await self._improve_response(question, initial_result, improvement_action['strategy'],
                                                            processing_route)
             return improved_result
 
         else:
-            initial_result.confidence = validation_result.confidence
-            return initial_result
+            return replace(initial_result, confidence=validation_result.confidence)
 
     async def _enhance_response(self, result: ProcessingResult, strategy: str) -> ProcessingResult:
         if strategy == 'add_details':
             enhanced_response = f"{result.response}\n\n补充说明：这个回答基于当前可用的信息，如需更详细的内容，请提供更具体的问题。"
-            result.response = enhanced_response
+            result = replace(result, response=enhanced_response)
 
         return result
 
-    async def _improve_response(self, result: ProcessingResult, strategy: Dict[str, str],
+    async def _improve_response(self, question: str, result: ProcessingResult, strategy: Dict[str, str],
                                 processing_route: Dict[str, Any]) -> ProcessingResult:
+        if not question:
+            return result
+
         improvement_route = processing_route.copy()
+        improvement_route['stages'] = list(processing_route.get('stages', []))
 
         if 'fact_verification' in strategy:
             improvement_route['stages'].append('additional_fact_check')
@@ -112,24 +115,21 @@ class UnifiedScheduler:
         if 'reasoning' in strategy:
             improvement_route['model_preference'] = 'quality'
 
-        try:
-            improved_result = await self.pipeline_executor.execute_pipeline(
-                result.original_question if hasattr(result, 'original_question') else "重新处理的问题",
-                improvement_route,
-                {}
-            )
-            return improved_result
-        except Exception:
+        if not improvement_route['stages']:
             return result
 
+        improved_result = await self.pipeline_executor.execute_pipeline(question, improvement_route, {})
+        return improved_result if improved_result.success else result
+
     async def _handle_processing_error(self, question: str, error: Exception, user_context: Dict[str, Any],
                                        processing_time: float) -> ProcessingResult:
-        error_result = ProcessingResult()
-        error_result.response = f"抱歉，处理您的问题时遇到了技术问题。错误信息：{str(error)[:100]}"
-        error_result.success = False
-        error_result.error = str(error)
-        error_result.processing_time = processing_time
-        error_result.confidence = 0.0
+        error_result = ProcessingResult(
+            response=f"抱歉，处理您的问题时遇到了技术问题。错误信息：{str(error)[:100]}",
+            success=False,
+            error=str(error),
+            processing_time=processing_time,
+            confidence=0.0
+        )
 
         await self._log_error(question, error, user_context)
 
@@ -1,6 +1,6 @@
 from .data_structures import (
     ProcessingRoute, RouteEvaluation, PipelineState, ProcessingResult,
-    ValidationResult, InteractionData, LearningPattern
+    ModelResponse, ValidationResult, InteractionData, LearningPattern
 )
 
 __all__ = [
@@ -8,6 +8,7 @@ __all__ = [
     'RouteEvaluation',
     'PipelineState',
     'ProcessingResult',
+    'ModelResponse',
     'ValidationResult',
     'InteractionData',
     'LearningPattern'
@@ -1,31 +1,112 @@
-from typing import Dict, Any, List, Optional, Union
-from dataclasses import dataclass, field
+import json
+import sys
+import time
+from collections import deque
+from itertools import chain, islice
+from types import MappingProxyType
+from typing import Callable, ClassVar, Deque, Dict, Any, List, Mapping, Optional, Set, Tuple, Union
+from dataclasses import dataclass, field, fields
 from datetime import datetime
-from enum import Enum
+from enum import IntEnum
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-class ProcessingStatus(Enum):
-    PENDING = "pending"
-    RUNNING = "running"
-    COMPLETED = "completed"
-    FAILED = "failed"
-    CANCELLED = "cancelled"
+DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+MAX_INTERACTION_HISTORY = 100
 
 
-class ValidationStatus(Enum):
-    PASSED = "passed"
-    FAILED = "failed"
-    WARNING = "warning"
-    PENDING = "pending"
+def _clamp01(value: float) -> float:
+    return 0.0 if value < 0.0 else 1.0 if value > 1.0 else value
 
 
-@dataclass
+def _serialized_field_names(cls, exclude: Tuple[str, ...] = ()) -> Tuple[str, ...]:
+    return tuple(f.name for f in fields(cls) if not f.name.startswith('_') and f.name not in exclude)
+
+
+def _fields_to_dict(obj) -> Dict[str, Any]:
+    serializers = obj._SERIALIZERS
+    data = {}
+    for name in obj._FIELDS:
+        value = getattr(obj, name)
+        serializer = serializers.get(name)
+        data[name] = serializer(value) if serializer else value
+    return data
+
+
+def _serialize_timestamp(timestamp: datetime) -> str:
+    return timestamp.isoformat()
+
+
+def _serialize_result(result: Optional['ProcessingResult']) -> Optional[Dict[str, Any]]:
+    return result.to_dict() if result else None
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default)
+    if hasattr(obj, 'to_dict'):
+        obj = obj.to_dict()
+    return json.dumps(obj, default=_json_default, ensure_ascii=False).encode('utf-8')
+
+
+def _status_from_name(enum_cls, value: Any):
+    if isinstance(value, str):
+        return enum_cls.__members__.get(value.upper())
+    return None
+
+
+class ProcessingStatus(IntEnum):
+    PENDING = 0
+    RUNNING = 1
+    COMPLETED = 2
+    FAILED = 3
+    CANCELLED = 4
+
+    @classmethod
+    def _missing_(cls, value):
+        # accept the lowercase names that used to be the member values
+        return _status_from_name(cls, value)
+
+
+class ValidationStatus(IntEnum):
+    PASSED = 0
+    FAILED = 1
+    WARNING = 2
+    PENDING = 3
+
+    @classmethod
+    def _missing_(cls, value):
+        # accept the lowercase names that used to be the member values
+        return _status_from_name(cls, value)
+
+
+_VALIDATION_PASSED = ValidationStatus.PASSED
+_VALIDATION_WARNING = ValidationStatus.WARNING
+_VALIDATION_FAILED = ValidationStatus.FAILED
+
+
+@dataclass(**DATACLASS_OPTIONS)
 class ProcessingRoute:
     stages: List[str] = field(default_factory=list)
     parallel_execution: bool = False
     timeout: float = 15.0
     model_preference: str = "balanced"
     context: Dict[str, Any] = field(default_factory=dict)
+    _stage_set: Set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._stage_set.update(self.stages)
 
     def copy(self):
         return ProcessingRoute(
@@ -37,18 +118,32 @@ class ProcessingRoute:
         )
 
     def add_stage(self, stage_name: str):
-        if stage_name not in self.stages:
+        if stage_name not in self._stage_set:
+            self._stage_set.add(stage_name)
             self.stages.append(stage_name)
 
     def remove_stage(self, stage_name: str):
-        if stage_name in self.stages:
+        if stage_name in self._stage_set:
+            self._stage_set.discard(stage_name)
             self.stages.remove(stage_name)
 
     def add_context(self, key: str, value: Any):
         self.context[key] = value
 
+    def route_key(self) -> Tuple[Any, ...]:
+        return tuple(self.stages), self.parallel_execution, self.timeout, self.model_preference
 
-@dataclass
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'stages': self.stages,
+            'parallel_execution': self.parallel_execution,
+            'timeout': self.timeout,
+            'model_preference': self.model_preference,
+            'context': self.context
+        }
+
+
+@dataclass(**DATACLASS_OPTIONS)
 class RouteEvaluation:
     predicted_quality: float = 0.0
     estimated_time: float = 0.0
@@ -61,13 +156,57 @@ class RouteEvaluation:
         self._validate_scores()
 
     def _validate_scores(self):
-        for field_name in ['predicted_quality', 'risk_assessment', 'user_satisfaction_prediction', 'overall_score']:
-            value = getattr(self, field_name)
-            if not 0.0 <= value <= 1.0:
-                setattr(self, field_name, max(0.0, min(1.0, value)))
+        self.predicted_quality = _clamp01(self.predicted_quality)
+        self.risk_assessment = _clamp01(self.risk_assessment)
+        self.user_satisfaction_prediction = _clamp01(self.user_satisfaction_prediction)
+        self.overall_score = _clamp01(self.overall_score)
+
+
+def _append_knowledge_dict(result: Dict[str, Any], contents: List[str]):
+    content = result.get('content')
+    if content:
+        contents.append(content)
+
+
+def _append_knowledge_str(result: str, contents: List[str]):
+    contents.append(result)
+
+
+_KNOWLEDGE_HANDLERS = {dict: _append_knowledge_dict, str: _append_knowledge_str}
+
+
+def _extract_knowledge_contents(results: Any) -> List[str]:
+    results_type = type(results)
+    if results_type is str:
+        return [results]
+    if results_type is not list:
+        return []
+
+    contents = []
+    handlers = _KNOWLEDGE_HANDLERS
+    for result in results:
+        handler = handlers.get(type(result))
+        if handler is not None:
+            handler(result, contents)
+    return contents
+
+
+def _format_tool_dict(tool_name: str, result: Dict[str, Any]) -> Optional[str]:
+    if 'result' in result:
+        return f"{tool_name}: {result['result']}"
+    if 'response' in result:
+        return f"{tool_name}: {result['response']}"
+    return None
+
+
+def _format_tool_str(tool_name: str, result: str) -> str:
+    return f"{tool_name}: {result}"
+
 
+_TOOL_RESULT_FORMATTERS = {dict: _format_tool_dict, str: _format_tool_str}
 
-@dataclass
+
+@dataclass(**DATACLASS_OPTIONS)
 class PipelineState:
     question: str
     route_config: Dict[str, Any]
@@ -81,10 +220,13 @@ class PipelineState:
     validation_results: Dict[str, Any] = field(default_factory=dict)
     metadata: Dict[str, Any] = field(default_factory=dict)
     errors: List[str] = field(default_factory=list)
-    start_time: float = field(default_factory=lambda: datetime.now().timestamp())
+    start_time: float = field(default_factory=time.monotonic)
+    _knowledge_contents: Dict[str, List[str]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _context_cache: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
 
     def add_knowledge_results(self, source: str, results: Any):
         self.knowledge_results[source] = results
+        self._knowledge_contents[source] = _extract_knowledge_contents(results)
 
     def add_tool_results(self, results: Dict[str, Any]):
         self.tool_results.update(results)
@@ -102,46 +244,40 @@ class PipelineState:
         self.response = response
 
     def set_confidence(self, confidence: float):
-        self.confidence = max(0.0, min(1.0, confidence))
+        self.confidence = _clamp01(confidence)
 
     def get_consolidated_knowledge(self) -> str:
-        consolidated = []
-        for source, results in self.knowledge_results.items():
-            if isinstance(results, list):
-                for result in results:
-                    if isinstance(result, dict) and 'content' in result:
-                        consolidated.append(result['content'])
-                    elif isinstance(result, str):
-                        consolidated.append(result)
-            elif isinstance(results, str):
-                consolidated.append(results)
-
-        return "\n".join(consolidated)
+        return "\n".join(chain.from_iterable(self._knowledge_contents.values()))
 
     def get_consolidated_tool_results(self) -> str:
         consolidated = []
+        append = consolidated.append
+        formatters = _TOOL_RESULT_FORMATTERS
         for tool_name, result in self.tool_results.items():
-            if isinstance(result, dict):
-                if 'result' in result:
-                    consolidated.append(f"{tool_name}: {result['result']}")
-                elif 'response' in result:
-                    consolidated.append(f"{tool_name}: {result['response']}")
-            elif isinstance(result, str):
-                consolidated.append(f"{tool_name}: {result}")
+            formatter = formatters.get(type(result))
+            if formatter is not None:
+                line = formatter(tool_name, result)
+                if line is not None:
+                    append(line)
 
         return "\n".join(consolidated)
 
     @property
     def knowledge_context(self) -> Dict[str, Any]:
-        return {
-            'question': self.processed_question or self.question,
-            'knowledge_results': self.knowledge_results,
-            'tool_results': self.tool_results,
-            'metadata': self.metadata
-        }
+        question = self.processed_question or self.question
+        context = self._context_cache
+        if context is None or context['question'] is not question:
+            context = {
+                'question': question,
+                'knowledge_results': self.knowledge_results,
+                'tool_results': self.tool_results,
+                'metadata': self.metadata
+            }
+            self._context_cache = context
+        return context
 
     def get_final_result(self) -> 'ProcessingResult':
-        processing_time = datetime.now().timestamp() - self.start_time
+        processing_time = time.monotonic() - self.start_time
 
         return ProcessingResult(
             response=self.response,
@@ -149,73 +285,119 @@ class PipelineState:
             success=len(self.errors) == 0 and bool(self.response),
             processing_time=processing_time,
             knowledge_sources=list(self.knowledge_results.keys()),
-            tool_results=self.tool_results,
-            validation_results=self.validation_results,
-            metadata=self.metadata,
-            errors=self.errors.copy()
+            tool_results=MappingProxyType(self.tool_results),
+            validation_results=MappingProxyType(self.validation_results),
+            metadata=MappingProxyType(self.metadata),
+            errors=tuple(self.errors)
         )
 
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_OPTIONS)
 class ProcessingResult:
     response: str = ""
     confidence: float = 0.0
     success: bool = False
     processing_time: float = 0.0
     knowledge_sources: List[str] = field(default_factory=list)
-    tool_results: Dict[str, Any] = field(default_factory=dict)
-    validation_results: Dict[str, Any] = field(default_factory=dict)
-    metadata: Dict[str, Any] = field(default_factory=dict)
-    errors: List[str] = field(default_factory=list)
+    tool_results: Mapping[str, Any] = field(default_factory=dict)
+    validation_results: Mapping[str, Any] = field(default_factory=dict)
+    metadata: Mapping[str, Any] = field(default_factory=dict)
+    errors: Tuple[str, ...] = ()
     error: Optional[str] = None
 
+    _FIELDS: ClassVar[Tuple[str, ...]] = ()
+    # read-only views stay on the attributes; to_dict hands out plain, JSON-ready copies
+    _SERIALIZERS: ClassVar[Dict[str, Callable[[Any], Any]]] = {
+        'knowledge_sources': list,
+        'tool_results': dict,
+        'validation_results': dict,
+        'metadata': dict,
+        'errors': list
+    }
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        return _fields_to_dict(self)
+
+    def to_json(self) -> bytes:
+        return _dumps(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ProcessingResult':
+        get = data.get
+        return cls(
+            response=get('response', ''),
+            confidence=get('confidence', 0.0),
+            success=get('success', False),
+            processing_time=get('processing_time', 0.0),
+            knowledge_sources=get('knowledge_sources') or [],
+            tool_results=get('tool_results') or {},
+            validation_results=get('validation_results') or {},
+            metadata=get('metadata') or {},
+            errors=tuple(get('errors') or ()),
+            error=get('error')
+        )
+
+
+@dataclass(**DATACLASS_OPTIONS)
+class ModelResponse:
+    model: str = "unknown"
+    response: str = ""
+    confidence: float = 0.5
+    processing_time: Optional[float] = None
+    quality_indicators: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'model': self.model,
             'response': self.response,
             'confidence': self.confidence,
-            'success': self.success,
-            'processing_time': self.processing_time,
-            'knowledge_sources': self.knowledge_sources,
-            'tool_results': self.tool_results,
-            'validation_results': self.validation_results,
-            'metadata': self.metadata,
-            'errors': self.errors,
-            'error': self.error
+            'processing_time': self.processing_time or 0.0
         }
+        if self.quality_indicators is not None:
+            data['quality_indicators'] = self.quality_indicators
+        if self.error is not None:
+            data['error'] = self.error
+        return data
 
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'ProcessingResult':
+    def from_dict(cls, data: Dict[str, Any]) -> 'ModelResponse':
+        get = data.get
         return cls(
-            response=data.get('response', ''),
-            confidence=data.get('confidence', 0.0),
-            success=data.get('success', False),
-            processing_time=data.get('processing_time', 0.0),
-            knowledge_sources=data.get('knowledge_sources', []),
-            tool_results=data.get('tool_results', {}),
-            validation_results=data.get('validation_results', {}),
-            metadata=data.get('metadata', {}),
-            errors=data.get('errors', []),
-            error=data.get('error')
+            model=get('model', 'unknown'),
+            response=get('response', ''),
+            confidence=get('confidence', 0.5),
+            processing_time=get('processing_time'),
+            quality_indicators=get('quality_indicators'),
+            error=get('error')
         )
 
 
-@dataclass
+@dataclass(**DATACLASS_OPTIONS)
 class ValidationResult:
     checks: Dict[str, float] = field(default_factory=dict)
     confidence: float = 0.0
     improvement_action: Dict[str, Any] = field(default_factory=dict)
     overall_score: float = 0.0
     status: ValidationStatus = ValidationStatus.PENDING
+    _checks_sum: float = field(default=0.0, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.checks:
+            self._checks_sum = sum(self.checks.values())
+            self._recalculate_overall_score()
 
     def add_check(self, check_name: str, score: float):
-        self.checks[check_name] = max(0.0, min(1.0, score))
+        clamped = _clamp01(score)
+        self._checks_sum += clamped - self.checks.get(check_name, 0.0)
+        self.checks[check_name] = clamped
         self._recalculate_overall_score()
 
     def get_check_result(self, check_name: str, default: float = 0.0) -> float:
         return self.checks.get(check_name, default)
 
     def set_confidence(self, confidence: float):
-        self.confidence = max(0.0, min(1.0, confidence))
+        self.confidence = _clamp01(confidence)
 
     def set_improvement_action(self, action: Dict[str, Any]):
         self.improvement_action = action
@@ -232,17 +414,18 @@ class ValidationResult:
             self.overall_score = 0.0
             return
 
-        self.overall_score = sum(self.checks.values()) / len(self.checks)
+        overall_score = self._checks_sum / len(self.checks)
+        self.overall_score = overall_score
 
-        if self.overall_score >= 0.8:
-            self.status = ValidationStatus.PASSED
-        elif self.overall_score >= 0.6:
-            self.status = ValidationStatus.WARNING
+        if overall_score >= 0.8:
+            self.status = _VALIDATION_PASSED
+        elif overall_score >= 0.6:
+            self.status = _VALIDATION_WARNING
         else:
-            self.status = ValidationStatus.FAILED
+            self.status = _VALIDATION_FAILED
 
 
-@dataclass
+@dataclass(**DATACLASS_OPTIONS)
 class InteractionData:
     question: str = ""
     classification: Dict[str, Any] = field(default_factory=dict)
@@ -260,26 +443,20 @@ class InteractionData:
     validation_result: Optional[ValidationResult] = None
     timestamp: datetime = field(default_factory=datetime.now)
 
+    _FIELDS: ClassVar[Tuple[str, ...]] = ()
+    _SERIALIZERS: ClassVar[Dict[str, Callable[[Any], Any]]] = {
+        'result': _serialize_result,
+        'timestamp': _serialize_timestamp
+    }
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            'question': self.question,
-            'classification': self.classification,
-            'processing_route': self.processing_route,
-            'result': self.result.to_dict() if self.result else None,
-            'total_processing_time': self.total_processing_time,
-            'complexity_level': self.complexity_level,
-            'user_satisfaction_score': self.user_satisfaction_score,
-            'resource_consumption': self.resource_consumption,
-            'cost_per_interaction': self.cost_per_interaction,
-            'error_count': self.error_count,
-            'total_steps': self.total_steps,
-            'was_escalated': self.was_escalated,
-            'user_feedback': self.user_feedback,
-            'timestamp': self.timestamp.isoformat()
-        }
+        return _fields_to_dict(self)
+
+    def to_json(self) -> bytes:
+        return _dumps(self.to_dict())
 
 
-@dataclass
+@dataclass(**DATACLASS_OPTIONS)
 class LearningPattern:
     pattern_type: str
     pattern_data: Dict[str, Any]
@@ -291,55 +468,82 @@ class LearningPattern:
         self.frequency += 1
         self.last_seen = datetime.now()
 
-    def calculate_relevance(self) -> float:
-        time_decay = 1.0
-        days_since_last_seen = (datetime.now() - self.last_seen).days
-        if days_since_last_seen > 0:
-            time_decay = max(0.1, 1.0 - (days_since_last_seen / 30))
+    def calculate_relevance(self, now: Optional[datetime] = None) -> float:
+        days_since_last_seen = ((now or datetime.now()) - self.last_seen).days
+        return _relevance_score(self.confidence, self.frequency, days_since_last_seen)
+
+
+def _relevance_score(confidence: float, frequency: int, days_since_last_seen: int) -> float:
+    time_decay = 1.0
+    if days_since_last_seen > 0:
+        time_decay = max(0.1, 1.0 - (days_since_last_seen / 30))
+
+    frequency_score = min(1.0, frequency / 10)
 
-        frequency_score = min(1.0, self.frequency / 10)
+    return confidence * 0.4 + frequency_score * 0.3 + time_decay * 0.3
 
-        return self.confidence * 0.4 + frequency_score * 0.3 + time_decay * 0.3
 
+def score_patterns(patterns: List[LearningPattern], now: Optional[datetime] = None) -> List[float]:
+    now = now or datetime.now()
+    return [
+        _relevance_score(pattern.confidence, pattern.frequency, (now - pattern.last_seen).days)
+        for pattern in patterns
+    ]
 
-@dataclass
+
+@dataclass(**DATACLASS_OPTIONS)
 class UserProfile:
     user_id: str
     expertise_level: str = "intermediate"
     preferred_domains: List[str] = field(default_factory=list)
     learning_style: str = "practical"
     communication_preference: str = "detailed"
-    interaction_history: List[InteractionData] = field(default_factory=list)
+    interaction_history: Deque[InteractionData] = field(
+        default_factory=lambda: deque(maxlen=MAX_INTERACTION_HISTORY))
     performance_metrics: Dict[str, float] = field(default_factory=dict)
     last_active: datetime = field(default_factory=datetime.now)
+    _success_count: int = field(default=0, init=False, repr=False, compare=False)
+    _satisfaction_sum: float = field(default=0.0, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not isinstance(self.interaction_history, deque) or \
+                self.interaction_history.maxlen != MAX_INTERACTION_HISTORY:
+            self.interaction_history = deque(self.interaction_history, maxlen=MAX_INTERACTION_HISTORY)
+        for interaction in self.interaction_history:
+            self._success_count += self._is_successful(interaction)
+            self._satisfaction_sum += interaction.user_satisfaction_score
 
     def add_interaction(self, interaction: InteractionData):
-        self.interaction_history.append(interaction)
-        self.last_active = datetime.now()
+        history = self.interaction_history
+        if len(history) == history.maxlen:
+            evicted = history[0]
+            self._success_count -= self._is_successful(evicted)
+            self._satisfaction_sum -= evicted.user_satisfaction_score
 
-        if len(self.interaction_history) > 100:
-            self.interaction_history = self.interaction_history[-100:]
+        history.append(interaction)
+        self._success_count += self._is_successful(interaction)
+        self._satisfaction_sum += interaction.user_satisfaction_score
+        self.last_active = interaction.timestamp
 
         self._update_performance_metrics(interaction)
 
     def get_recent_interactions(self, limit: int = 10) -> List[InteractionData]:
-        return self.interaction_history[-limit:]
+        history = self.interaction_history
+        return list(islice(history, max(0, len(history) - limit), None))
+
+    @staticmethod
+    def _is_successful(interaction: InteractionData) -> int:
+        return 1 if interaction.result and interaction.result.success else 0
 
     def _update_performance_metrics(self, interaction: InteractionData):
         if interaction.result:
-            current_avg = self.performance_metrics.get('avg_satisfaction', 0.0)
             total_interactions = len(self.interaction_history)
-
-            new_avg = (current_avg * (
-                        total_interactions - 1) + interaction.user_satisfaction_score) / total_interactions
-            self.performance_metrics['avg_satisfaction'] = new_avg
-
+            self.performance_metrics['avg_satisfaction'] = self._satisfaction_sum / total_interactions
             self.performance_metrics['total_interactions'] = total_interactions
-            self.performance_metrics['success_rate'] = sum(
-                1 for i in self.interaction_history if i.result and i.result.success) / total_interactions
+            self.performance_metrics['success_rate'] = self._success_count / total_interactions
 
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_OPTIONS)
 class SystemMetrics:
     timestamp: datetime = field(default_factory=datetime.now)
     response_time_avg: float = 0.0
@@ -351,15 +555,20 @@ class SystemMetrics:
     cache_hit_rate: float = 0.0
     model_performance: Dict[str, float] = field(default_factory=dict)
 
+    _FIELDS: ClassVar[Tuple[str, ...]] = ()
+    _SERIALIZERS: ClassVar[Dict[str, Callable[[Any], Any]]] = {
+        'timestamp': _serialize_timestamp,
+        'resource_utilization': dict,
+        'model_performance': dict
+    }
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            'timestamp': self.timestamp.isoformat(),
-            'response_time_avg': self.response_time_avg,
-            'response_time_p95': self.response_time_p95,
-            'error_rate': self.error_rate,
-            'throughput': self.throughput,
-            'resource_utilization': self.resource_utilization,
-            'active_users': self.active_users,
-            'cache_hit_rate': self.cache_hit_rate,
-            'model_performance': self.model_performance
-        }
\ No newline at end of file
+        return _fields_to_dict(self)
+
+    def to_json(self) -> bytes:
+        return _dumps(self)
+
+
+ProcessingResult._FIELDS = _serialized_field_names(ProcessingResult)
+InteractionData._FIELDS = _serialized_field_names(InteractionData, exclude=('validation_result',))
+SystemMetrics._FIELDS = _serialized_field_names(SystemMetrics)
@@ -1,63 +1,234 @@
 import asyncio
+import os
+import re
 import statistics
-from typing import Dict, Any, List, Optional, Tuple
+from operator import attrgetter
+from dataclasses import dataclass, field
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple, Union
 from config.models_config import ModelsConfig
+from data.data_structures import DATACLASS_OPTIONS, ModelResponse
+from utils.logging_utils import get_logger
+
+logger = get_logger('ensemble_coordinator')
+
+SIMILARITY_THRESHOLD = 0.6
+_by_confidence = attrgetter('confidence')
+TOKEN_SCAN_LIMIT = 4096
+DEFAULT_MAX_PARALLEL_INFERENCE = 8
+
+
+def _max_parallel_inference() -> int:
+    raw = os.getenv("QAINTELL_MAX_PARALLEL")
+    if raw is None:
+        return DEFAULT_MAX_PARALLEL_INFERENCE
+    try:
+        value = int(raw)
+    except ValueError:
+        logger.warning(f"Invalid QAINTELL_MAX_PARALLEL {raw!r}, using {DEFAULT_MAX_PARALLEL_INFERENCE}")
+        return DEFAULT_MAX_PARALLEL_INFERENCE
+    if value < 1:
+        # Semaphore(0) would block every inference forever
+        logger.warning(f"QAINTELL_MAX_PARALLEL must be at least 1, got {value}; using 1")
+        return 1
+    return value
+
+
+MAX_PARALLEL_INFERENCE = _max_parallel_inference()
+
+if hasattr(int, 'bit_count'):
+    _popcount = int.bit_count
+else:
+    def _popcount(value: int) -> int:
+        return bin(value).count('1')
+
+
+def _argmax(values: List[float]) -> int:
+    return max(range(len(values)), key=values.__getitem__)
+
+
+def _alternation(terms: Tuple[str, ...]) -> str:
+    return '|'.join(map(re.escape, sorted(terms, key=len, reverse=True)))
+
+
+def _compile_terms(terms: Tuple[str, ...]) -> 're.Pattern':
+    # lookahead so overlapping terms (e.g. 百分比/比例) are all reported, as with `term in text`
+    return re.compile(f'(?=({_alternation(terms)}))')
+
+
+def _terms_by_length(terms: Tuple[str, ...]) -> Tuple[Tuple[int, FrozenSet[str]], ...]:
+    return tuple(
+        (length, frozenset(term for term in terms if len(term) == length))
+        for length in sorted({len(term) for term in terms})
+    )
+
+
+TECHNICAL_TERMS = (
+    '算法', '架构', '系统', '框架', '优化', '分析', '设计', '实现',
+    '模型', '数据', '处理', '计算', '网络', '协议', '接口', '服务'
+)
+DEPTH_INDICATORS = ('为什么', '如何实现', '原理', '机制', '深入分析', '详细说明')
+INFO_INDICATORS = (
+    '数据', '研究', '分析', '报告', '统计', '比例', '百分比',
+    '例如', '比如', '具体', '详细', '包括', '涉及', '方面'
+)
+
+SEQUENCE_MARKERS = ('首先', '其次', '最后', '另外', '此外')
+CAUSAL_MARKERS = ('因为', '所以', '因此', '由于')
+KEY_MARKERS = ('重要', '关键', '主要', '核心', '特别')
+LAYOUT_MARKERS = ('\n', '：')
+
+MOCK_RESPONSE_TEMPLATES = {
+    'qwen-turbo': "快速回答：关于{question}的基本信息和要点。",
+    'qwen-plus': "详细分析：{question}涉及多个方面，需要综合考虑相关因素和背景。",
+    'qwen-max': "深度解答：{question}是一个复杂主题，从理论基础到实际应用都有重要意义。"
+}
+DEFAULT_MOCK_RESPONSE_TEMPLATE = "关于{question}的回答"
+
+_TECHNICAL_TERM_SETS = _terms_by_length(TECHNICAL_TERMS)
+_DEPTH_INDICATOR_SETS = _terms_by_length(DEPTH_INDICATORS)
+_KEY_MARKERS_PATTERN = _compile_terms(KEY_MARKERS)
+_QUALITY_MARKERS_PATTERN = re.compile('(?=' + '|'.join(
+    f'(?P<{group}>{_alternation(terms)})'
+    for group, terms in (
+        ('sequence', SEQUENCE_MARKERS),
+        ('causal', CAUSAL_MARKERS),
+        ('layout', LAYOUT_MARKERS),
+        ('info', INFO_INDICATORS)
+    )
+) + ')')
+
+
+@dataclass(**DATACLASS_OPTIONS)
+class _TextCache:
+    lower: str
+    tokens_list: List[str]
+    tokens_set: FrozenSet[str]
+    _ngrams: Dict[int, FrozenSet[str]] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def of(cls, text: str) -> '_TextCache':
+        lower = text if text.islower() else text.lower()
+        tokens = lower[:TOKEN_SCAN_LIMIT].split()
+        return cls(lower, tokens, frozenset(tokens))
+
+    def ngrams(self, n: int) -> FrozenSet[str]:
+        grams = self._ngrams.get(n)
+        if grams is None:
+            lower = self.lower
+            grams = self._ngrams[n] = frozenset(lower[i:i + n] for i in range(len(lower) - n + 1))
+        return grams
+
+    def count_terms(self, term_sets: Tuple[Tuple[int, FrozenSet[str]], ...]) -> int:
+        return sum(len(self.ngrams(length) & terms) for length, terms in term_sets)
+
+
+@dataclass(**DATACLASS_OPTIONS)
+class _QualityFeatures:
+    length: int
+    sentence_count: int
+    has_sequence: bool
+    has_causal: bool
+    has_layout: bool
+    info_count: int
+    tokens_set: FrozenSet[str]
+
+
+_MODELS_CONFIG: Optional[ModelsConfig] = None
+
+
+def _get_models_config() -> ModelsConfig:
+    global _MODELS_CONFIG
+    if _MODELS_CONFIG is None:
+        _MODELS_CONFIG = ModelsConfig()
+    return _MODELS_CONFIG
+
+
+def _processing_time(response: ModelResponse, default: float) -> float:
+    processing_time = response.processing_time
+    return default if processing_time is None else processing_time
+
+
+def _text_cache(texts: Dict[str, _TextCache], text: str) -> _TextCache:
+    cache = texts.get(text)
+    if cache is None:
+        cache = texts[text] = _TextCache.of(text)
+    return cache
 
 
 class EnsembleCoordinator:
-    def __init__(self):
-        self.models_config = ModelsConfig()
-        self.voting_strategies = {
-            'majority': self._majority_voting,
-            'weighted': self._weighted_voting,
-            'confidence': self._confidence_based_voting,
-            'quality': self._quality_based_voting,
-            'consensus': self._consensus_building
-        }
+    _quality_weight_cache: Optional[Dict[str, float]] = None
+
+    def __init__(self, simulate_latency: bool = True):
+        self.models_config = _get_models_config()
+        self._simulate_latency = simulate_latency
+        self._mock_table = {name: self._mock_scores(name) for name in self.models_config.AVAILABLE_MODELS}
+        self._inference_semaphore: Optional[asyncio.Semaphore] = None
 
-    async def coordinate_responses(self, responses: List[Dict[str, Any]], question: str, strategy: str = 'weighted') -> \
-    Dict[str, Any]:
+    async def coordinate_responses(self, responses: List[Union[ModelResponse, Dict[str, Any]]], question: str,
+                                   strategy: str = 'weighted') -> Dict[str, Any]:
         if not responses:
             return self._create_empty_response()
 
+        responses = [r if isinstance(r, ModelResponse) else ModelResponse.from_dict(r) for r in responses]
+
         if len(responses) == 1:
             return self._format_single_response(responses[0])
 
-        voting_strategy = self.voting_strategies.get(strategy, self._weighted_voting)
-        coordinated_response = await voting_strategy(responses, question)
+        if strategy == 'single':
+            return self._format_single_response(max(responses, key=_by_confidence))
+
+        texts = {question: _TextCache.of(question)}
+        for response in responses:
+            _text_cache(texts, response.response)
+
+        if strategy == 'weighted':
+            coordinated_response = self._weighted_voting(responses, question, texts)
+        elif strategy == 'majority':
+            coordinated_response = self._majority_voting(responses, question, texts)
+        elif strategy == 'confidence':
+            coordinated_response = self._confidence_based_voting(responses, question, texts)
+        elif strategy == 'quality':
+            coordinated_response = self._quality_based_voting(responses, question, texts)
+        elif strategy == 'consensus':
+            coordinated_response = self._consensus_building(responses, question, texts)
+        else:
+            coordinated_response = self._weighted_voting(responses, question, texts)
 
         coordination_metadata = self._generate_coordination_metadata(responses, strategy)
         coordinated_response.update(coordination_metadata)
 
         return coordinated_response
 
-    async def parallel_inference(self, models: List[str], question: str, context: Dict[str, Any]) -> List[
-        Dict[str, Any]]:
-        tasks = []
-        for model_name in models:
-            task = self._single_model_inference(model_name, question, context)
-            tasks.append(task)
+    async def parallel_inference(self, models: List[str], question: str,
+                                 context: Dict[str, Any]) -> List[ModelResponse]:
+        if self._inference_semaphore is None:
+            self._inference_semaphore = asyncio.Semaphore(MAX_PARALLEL_INFERENCE)
+        semaphore = self._inference_semaphore
+
+        async def guarded_inference(model_name: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._single_model_inference(model_name, question, context)
 
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
+        responses = await asyncio.gather(*[guarded_inference(m) for m in models], return_exceptions=True)
 
         valid_responses = []
         for i, response in enumerate(responses):
             if not isinstance(response, Exception):
-                valid_responses.append({
-                    'model': models[i],
-                    'response': response.get('response', ''),
-                    'confidence': response.get('confidence', 0.5),
-                    'processing_time': response.get('processing_time', 0.0),
-                    'quality_indicators': response.get('quality_indicators', {})
-                })
+                valid_responses.append(ModelResponse(
+                    model=models[i],
+                    response=response.get('response', ''),
+                    confidence=response.get('confidence', 0.5),
+                    processing_time=response.get('processing_time', 0.0),
+                    quality_indicators=response.get('quality_indicators', {})
+                ))
             else:
-                valid_responses.append({
-                    'model': models[i],
-                    'response': f"模型 {models[i]} 处理失败: {str(response)}",
-                    'confidence': 0.0,
-                    'processing_time': 0.0,
-                    'error': str(response)
-                })
+                valid_responses.append(ModelResponse(
+                    model=models[i],
+                    response=f"模型 {models[i]} 处理失败: {str(response)}",
+                    confidence=0.0,
+                    processing_time=0.0,
+                    error=str(response)
+                ))
 
         return valid_responses
 
@@ -76,65 +247,72 @@ class EnsembleCoordinator:
             strategy = 'consensus'
 
         if len(selected_models) == 1:
-            response = await self._single_model_inference(selected_models[0], question, context)
-            return self._format_single_response(response)
+            model_name = selected_models[0]
+            response = await self._single_model_inference(model_name, question, context)
+            return self._format_single_response(ModelResponse.from_dict({'model': model_name, **response}))
 
         responses = await self.parallel_inference(selected_models, question, context)
         return await self.coordinate_responses(responses, question, strategy)
 
-    async def _majority_voting(self, responses: List[Dict[str, Any]], question: str) -> Dict[str, Any]:
+    def _majority_voting(self, responses: List[ModelResponse], question: str,
+                         texts: Dict[str, _TextCache]) -> Dict[str, Any]:
         if len(responses) < 3:
-            return await self._weighted_voting(responses, question)
+            return self._weighted_voting(responses, question, texts)
 
-        response_groups = self._group_similar_responses(responses)
+        response_groups = self._group_similar_responses(responses, texts)
 
         largest_group = max(response_groups, key=len)
 
         if len(largest_group) == 1 and len(responses) >= 3:
-            weighted_response = await self._weighted_voting(responses, question)
+            weighted_response = self._weighted_voting(responses, question, texts)
             weighted_response['voting_method'] = 'fallback_to_weighted'
             return weighted_response
 
-        group_confidence = sum(r['confidence'] for r in largest_group) / len(largest_group)
-        representative_response = max(largest_group, key=lambda r: r['confidence'])
+        group_confidence = sum(r.confidence for r in largest_group) / len(largest_group)
+        representative_response = max(largest_group, key=_by_confidence)
 
         return {
-            'response': representative_response['response'],
+            'response': representative_response.response,
             'confidence': group_confidence,
             'ensemble_size': len(responses),
             'consensus_size': len(largest_group),
             'voting_method': 'majority',
-            'contributing_models': [r['model'] for r in largest_group]
+            'contributing_models': [r.model for r in largest_group]
         }
 
-    async def _weighted_voting(self, responses: List[Dict[str, Any]], question: str) -> Dict[str, Any]:
-        weights = self._calculate_model_weights(responses)
+    def _weighted_voting(self, responses: List[ModelResponse], question: str,
+                         texts: Dict[str, _TextCache]) -> Dict[str, Any]:
+        return self._weighted_voting_core(responses, self._calculate_model_weights(responses))
 
+    def _weighted_voting_core(self, responses: List[ModelResponse], weights: List[float]) -> Dict[str, Any]:
         weighted_responses = []
+        valid_weights = []
         total_weight = 0
+        confidence_sum = 0.0
 
         for response, weight in zip(responses, weights):
-            if 'error' not in response:
+            if response.error is None:
+                confidence = response.confidence
                 weighted_responses.append({
-                    'content': response['response'],
+                    'content': response.response,
                     'weight': weight,
-                    'confidence': response['confidence'],
-                    'model': response['model']
+                    'confidence': confidence,
+                    'model': response.model
                 })
+                valid_weights.append(weight)
                 total_weight += weight
+                confidence_sum += confidence * weight
 
         if not weighted_responses:
             return self._create_error_response("所有模型都发生错误")
 
         if total_weight == 0:
-            weights = [1.0] * len(weighted_responses)
+            valid_weights = [1.0] * len(weighted_responses)
             total_weight = len(weighted_responses)
-        else:
-            weights = [wr['weight'] for wr in weighted_responses]
 
-        final_response = self._combine_weighted_responses(weighted_responses, weights, total_weight)
+        final_response = self._combine_weighted_responses(weighted_responses, valid_weights, total_weight)
 
-        weighted_confidence = sum(wr['confidence'] * wr['weight'] for wr in weighted_responses) / total_weight
+        weighted_confidence = confidence_sum / total_weight
 
         return {
             'response': final_response,
@@ -145,60 +323,51 @@ class EnsembleCoordinator:
             'model_weights': {wr['model']: wr['weight'] for wr in weighted_responses}
         }
 
-    async def _confidence_based_voting(self, responses: List[Dict[str, Any]], question: str) -> Dict[str, Any]:
-        valid_responses = [r for r in responses if 'error' not in r]
+    def _confidence_based_voting(self, responses: List[ModelResponse], question: str,
+                                 texts: Dict[str, _TextCache]) -> Dict[str, Any]:
+        valid_indices = [i for i, r in enumerate(responses) if r.error is None]
 
-        if not valid_responses:
+        if not valid_indices:
             return self._create_error_response("所有模型都发生错误")
 
         confidence_threshold = 0.7
-        high_confidence_responses = [r for r in valid_responses if r['confidence'] >= confidence_threshold]
+        selected_indices = [i for i in valid_indices if responses[i].confidence >= confidence_threshold]
 
-        if high_confidence_responses:
-            selected_responses = high_confidence_responses
-        else:
-            selected_responses = sorted(valid_responses, key=lambda r: r['confidence'], reverse=True)[:2]
+        if not selected_indices:
+            selected_indices = sorted(valid_indices, key=lambda i: responses[i].confidence, reverse=True)[:2]
 
-        if len(selected_responses) == 1:
-            best_response = selected_responses[0]
+        if len(selected_indices) == 1:
+            best_response = responses[selected_indices[0]]
             return {
-                'response': best_response['response'],
-                'confidence': best_response['confidence'],
+                'response': best_response.response,
+                'confidence': best_response.confidence,
                 'ensemble_size': len(responses),
                 'voting_method': 'confidence_single',
-                'selected_model': best_response['model']
+                'selected_model': best_response.model
             }
 
-        return await self._weighted_voting(selected_responses, question)
+        return self._weighted_voting_subset(responses, selected_indices)
 
-    async def _quality_based_voting(self, responses: List[Dict[str, Any]], question: str) -> Dict[str, Any]:
-        quality_scores = []
-
-        for response in responses:
-            if 'error' in response:
-                quality_scores.append(0.0)
-            else:
-                quality_score = self._calculate_response_quality(response['response'], question)
-                quality_scores.append(quality_score)
+    def _quality_based_voting(self, responses: List[ModelResponse], question: str,
+                              texts: Dict[str, _TextCache]) -> Dict[str, Any]:
+        quality_scores = self._batch_response_quality(responses, question, texts)
 
         quality_threshold = 0.6
         high_quality_indices = [i for i, score in enumerate(quality_scores) if score >= quality_threshold]
 
-        if high_quality_indices:
-            selected_responses = [responses[i] for i in high_quality_indices]
-        else:
-            best_index = max(range(len(quality_scores)), key=lambda i: quality_scores[i])
-            selected_responses = [responses[best_index]]
+        if not high_quality_indices:
+            high_quality_indices = [_argmax(quality_scores)]
 
-        return await self._weighted_voting(selected_responses, question)
+        return self._weighted_voting_subset(responses, high_quality_indices)
 
-    async def _consensus_building(self, responses: List[Dict[str, Any]], question: str) -> Dict[str, Any]:
-        valid_responses = [r for r in responses if 'error' not in r]
+    def _consensus_building(self, responses: List[ModelResponse], question: str,
+                            texts: Dict[str, _TextCache]) -> Dict[str, Any]:
+        valid_responses = [r for r in responses if r.error is None]
 
         if len(valid_responses) <= 1:
-            return await self._weighted_voting(responses, question)
+            return self._weighted_voting(responses, question, texts)
 
-        consensus_analysis = self._analyze_consensus(valid_responses)
+        consensus_analysis = self._analyze_consensus(valid_responses, texts)
 
         if consensus_analysis['consensus_level'] >= 0.7:
             consensus_response = self._build_consensus_response(valid_responses, consensus_analysis)
@@ -212,42 +381,37 @@ class EnsembleCoordinator:
                 'disagreement_points': consensus_analysis['differences']
             }
         else:
-            return await self._weighted_voting(valid_responses, question)
-
-    def _calculate_model_weights(self, responses: List[Dict[str, Any]]) -> List[float]:
-        weights = []
-
-        for response in responses:
-            if 'error' in response:
-                weights.append(0.0)
-                continue
-
-            model_name = response['model']
-            base_weight = 1.0
-
-            if model_name in self.models_config.AVAILABLE_MODELS:
-                model_config = self.models_config.AVAILABLE_MODELS[model_name]
-                quality_weight = model_config['quality_score'] / 10.0
-                base_weight = quality_weight
-
-            confidence_weight = response['confidence']
-
-            processing_time = response.get('processing_time', 5.0)
-            speed_weight = max(0.1, 1.0 - processing_time / 30.0)
-
-            final_weight = base_weight * 0.4 + confidence_weight * 0.4 + speed_weight * 0.2
-            weights.append(final_weight)
+            return self._weighted_voting(valid_responses, question, texts)
+
+    def _weighted_voting_subset(self, responses: List[ModelResponse], indices: List[int]) -> Dict[str, Any]:
+        selected_responses = [responses[i] for i in indices]
+        return self._weighted_voting_core(selected_responses, self._calculate_model_weights(selected_responses))
+
+    def _calculate_model_weights(self, responses: List[ModelResponse]) -> List[float]:
+        quality_weights = EnsembleCoordinator._quality_weight_cache
+        if quality_weights is None:
+            quality_weights = EnsembleCoordinator._quality_weight_cache = {
+                name: config.quality_score / 10.0
+                for name, config in self.models_config.AVAILABLE_MODELS.items()
+            }
 
-        return weights
+        return [
+            0.0 if response.error is not None else
+            quality_weights.get(response.model, 1.0) * 0.4 +
+            response.confidence * 0.4 +
+            max(0.1, 1.0 - _processing_time(response, 5.0) / 30.0) * 0.2
+            for response in responses
+        ]
 
     def _combine_weighted_responses(self, weighted_responses: List[Dict[str, Any]], weights: List[float],
                                     total_weight: float) -> str:
         if len(weighted_responses) == 1:
             return weighted_responses[0]['content']
 
-        primary_response = max(weighted_responses, key=lambda r: r['weight'])
+        primary_index = _argmax(weights)
+        primary_response = weighted_responses[primary_index]
 
-        other_responses = [r for r in weighted_responses if r != primary_response]
+        other_responses = [r for i, r in enumerate(weighted_responses) if i != primary_index]
 
         combined_response = primary_response['content']
 
@@ -267,47 +431,72 @@ class EnsembleCoordinator:
 
         return combined_response
 
-    def _group_similar_responses(self, responses: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
-        groups = []
-
-        for response in responses:
-            if 'error' in response:
-                continue
-
-            placed = False
-            for group in groups:
-                if self._responses_similar(response, group[0]):
-                    group.append(response)
-                    placed = True
-                    break
-
-            if not placed:
-                groups.append([response])
-
-        return groups
-
-    def _responses_similar(self, response1: Dict[str, Any], response2: Dict[str, Any]) -> bool:
-        text1 = response1['response'].lower()
-        text2 = response2['response'].lower()
-
-        words1 = set(text1.split())
-        words2 = set(text2.split())
-
-        if not words1 or not words2:
+    def _group_similar_responses(self, responses: List[ModelResponse],
+                                 texts: Dict[str, _TextCache]) -> List[List[ModelResponse]]:
+        valid_responses = [r for r in responses if r.error is None]
+        bitsets, _ = self._token_bitsets(self._token_sets(valid_responses, texts))
+
+        parent = list(range(len(valid_responses)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, bits_i in enumerate(bitsets):
+            for j in range(i + 1, len(bitsets)):
+                if self._bitsets_similar(bits_i, bitsets[j]):
+                    root_i, root_j = find(i), find(j)
+                    if root_i != root_j:
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        groups: Dict[int, List[ModelResponse]] = {}
+        for i, response in enumerate(valid_responses):
+            groups.setdefault(find(i), []).append(response)
+
+        return list(groups.values())
+
+    def _token_sets(self, responses: List[ModelResponse], texts: Dict[str, _TextCache]) -> List[FrozenSet[str]]:
+        return [_text_cache(texts, r.response).tokens_set for r in responses]
+
+    def _token_bitsets(self, token_sets: List[FrozenSet[str]]) -> Tuple[List[int], List[str]]:
+        token_ids = {}
+        vocabulary = []
+        bitsets = []
+        for tokens in token_sets:
+            bits = 0
+            for token in tokens:
+                token_id = token_ids.get(token)
+                if token_id is None:
+                    token_id = token_ids[token] = len(vocabulary)
+                    vocabulary.append(token)
+                bits |= 1 << token_id
+            bitsets.append(bits)
+        return bitsets, vocabulary
+
+    def _bitsets_similar(self, bits1: int, bits2: int) -> bool:
+        if not bits1 or not bits2:
             return False
 
-        intersection = len(words1.intersection(words2))
-        union = len(words1.union(words2))
+        similarity = _popcount(bits1 & bits2) / _popcount(bits1 | bits2)
 
-        similarity = intersection / union if union > 0 else 0
+        return similarity > SIMILARITY_THRESHOLD
 
-        return similarity > 0.6
+    def _decode_bitset(self, bits: int, vocabulary: List[str], limit: int) -> List[str]:
+        tokens = []
+        while bits and len(tokens) < limit:
+            low_bit = bits & -bits
+            tokens.append(vocabulary[low_bit.bit_length() - 1])
+            bits ^= low_bit
+        return tokens
 
     def _estimate_question_complexity(self, question: str) -> int:
+        text = _TextCache.of(question)
         complexity_indicators = {
-            'length': min(len(question.split()) / 15, 2),
-            'technical_terms': self._count_technical_terms(question),
-            'question_depth': self._analyze_question_depth(question)
+            'length': min(len(text.tokens_list) / 15, 2),
+            'technical_terms': self._count_technical_terms(text),
+            'question_depth': self._analyze_question_depth(text)
         }
 
         total_score = sum(complexity_indicators.values())
@@ -321,64 +510,82 @@ class EnsembleCoordinator:
         else:
             return 1
 
-    def _count_technical_terms(self, question: str) -> int:
-        technical_terms = [
-            '算法', '架构', '系统', '框架', '优化', '分析', '设计', '实现',
-            '模型', '数据', '处理', '计算', '网络', '协议', '接口', '服务'
-        ]
+    def _count_technical_terms(self, text: _TextCache) -> int:
+        return text.count_terms(_TECHNICAL_TERM_SETS)
 
-        question_lower = question.lower()
-        return sum(1 for term in technical_terms if term in question_lower)
+    def _analyze_question_depth(self, text: _TextCache) -> float:
+        depth_count = text.count_terms(_DEPTH_INDICATOR_SETS)
+        return min(depth_count / 2, 2.0)
 
-    def _analyze_question_depth(self, question: str) -> float:
-        depth_indicators = ['为什么', '如何实现', '原理', '机制', '深入分析', '详细说明']
-        question_lower = question.lower()
+    def _batch_response_quality(self, responses: List[ModelResponse], question: str,
+                                texts: Dict[str, _TextCache]) -> List[float]:
+        question_words = _text_cache(texts, question).tokens_set
+        score = self._calculate_response_quality
 
-        depth_count = sum(1 for indicator in depth_indicators if indicator in question_lower)
-        return min(depth_count / 2, 2.0)
+        return [
+            0.0 if response.error is not None else score(response.response, question_words, texts)
+            for response in responses
+        ]
 
-    def _calculate_response_quality(self, response: str, question: str) -> float:
+    def _calculate_response_quality(self, response: str, question_words: FrozenSet[str],
+                                    texts: Dict[str, _TextCache]) -> float:
         if not response or len(response.strip()) < 20:
             return 0.0
 
-        quality_score = 0.0
-
-        length_score = min(len(response) / 200, 1.0) * 0.2
-        quality_score += length_score
+        features = self._quality_scan(response, _text_cache(texts, response))
 
-        structure_score = self._analyze_response_structure(response) * 0.3
-        quality_score += structure_score
-
-        relevance_score = self._calculate_relevance(response, question) * 0.3
-        quality_score += relevance_score
-
-        informativeness_score = self._calculate_informativeness(response) * 0.2
-        quality_score += informativeness_score
+        quality_score = (
+            min(features.length / 200, 1.0) * 0.2 +
+            self._analyze_response_structure(features) * 0.3 +
+            self._calculate_relevance(features.tokens_set, question_words) * 0.3 +
+            self._calculate_informativeness(features) * 0.2
+        )
 
         return min(quality_score, 1.0)
 
-    def _analyze_response_structure(self, response: str) -> float:
+    def _quality_scan(self, response: str, text: _TextCache) -> _QualityFeatures:
+        has_sequence = has_causal = has_layout = False
+        info_terms = set()
+
+        for match in _QUALITY_MARKERS_PATTERN.finditer(text.lower):
+            group = match.lastgroup
+            if group == 'info':
+                info_terms.add(match.group(group))
+            elif group == 'sequence':
+                has_sequence = True
+            elif group == 'causal':
+                has_causal = True
+            else:
+                has_layout = True
+
+        return _QualityFeatures(
+            length=len(response),
+            sentence_count=sum(1 for sentence in response.split('。') if sentence.strip()),
+            has_sequence=has_sequence,
+            has_causal=has_causal,
+            has_layout=has_layout,
+            info_count=len(info_terms),
+            tokens_set=text.tokens_set
+        )
+
+    def _analyze_response_structure(self, features: _QualityFeatures) -> float:
         structure_score = 0.0
 
-        sentences = [s.strip() for s in response.split('。') if s.strip()]
-        if len(sentences) >= 2:
+        if features.sentence_count >= 2:
             structure_score += 0.3
 
-        if any(marker in response for marker in ['首先', '其次', '最后', '另外', '此外']):
+        if features.has_sequence:
             structure_score += 0.3
 
-        if any(marker in response for marker in ['因为', '所以', '因此', '由于']):
+        if features.has_causal:
             structure_score += 0.2
 
-        if '\n' in response or '：' in response:
+        if features.has_layout:
             structure_score += 0.2
 
         return min(structure_score, 1.0)
 
-    def _calculate_relevance(self, response: str, question: str) -> float:
-        question_words = set(question.lower().split())
-        response_words = set(response.lower().split())
-
+    def _calculate_relevance(self, response_words: FrozenSet[str], question_words: FrozenSet[str]) -> float:
         if not question_words or not response_words:
             return 0.0
 
@@ -387,47 +594,39 @@ class EnsembleCoordinator:
 
         return min(relevance, 1.0)
 
-    def _calculate_informativeness(self, response: str) -> float:
-        info_indicators = [
-            '数据', '研究', '分析', '报告', '统计', '比例', '百分比',
-            '例如', '比如', '具体', '详细', '包括', '涉及', '方面'
-        ]
-
-        response_lower = response.lower()
-        info_count = sum(1 for indicator in info_indicators if indicator in response_lower)
+    def _calculate_informativeness(self, features: _QualityFeatures) -> float:
+        return min(features.info_count / 5, 1.0)
 
-        return min(info_count / 5, 1.0)
-
-    def _analyze_consensus(self, responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _analyze_consensus(self, responses: List[ModelResponse], texts: Dict[str, _TextCache]) -> Dict[str, Any]:
         if len(responses) <= 1:
             return {
                 'consensus_level': 1.0,
-                'average_confidence': responses[0]['confidence'] if responses else 0.0,
+                'average_confidence': responses[0].confidence if responses else 0.0,
                 'common_points': [],
                 'differences': []
             }
 
-        all_words = []
-        for response in responses:
-            words = set(response['response'].lower().split())
-            all_words.append(words)
+        bitsets, vocabulary = self._token_bitsets(self._token_sets(responses, texts))
 
-        common_words = set.intersection(*all_words) if all_words else set()
-        all_unique_words = set.union(*all_words) if all_words else set()
+        common_bits = bitsets[0]
+        union_bits = 0
+        for bits in bitsets:
+            common_bits &= bits
+            union_bits |= bits
 
-        consensus_level = len(common_words) / len(all_unique_words) if all_unique_words else 0.0
+        consensus_level = _popcount(common_bits) / _popcount(union_bits) if union_bits else 0.0
 
-        average_confidence = sum(r['confidence'] for r in responses) / len(responses)
+        average_confidence = sum(r.confidence for r in responses) / len(responses)
 
-        common_points = list(common_words)[:10]
+        common_points = self._decode_bitset(common_bits, vocabulary, 10)
 
         differences = []
-        for i, response in enumerate(responses):
-            unique_words = all_words[i] - common_words
-            if unique_words:
+        for response, bits in zip(responses, bitsets):
+            unique_bits = bits & ~common_bits
+            if unique_bits:
                 differences.append({
-                    'model': response['model'],
-                    'unique_aspects': list(unique_words)[:5]
+                    'model': response.model,
+                    'unique_aspects': self._decode_bitset(unique_bits, vocabulary, 5)
                 })
 
         return {
@@ -437,10 +636,10 @@ class EnsembleCoordinator:
             'differences': differences
         }
 
-    def _build_consensus_response(self, responses: List[Dict[str, Any]], consensus_analysis: Dict[str, Any]) -> str:
-        primary_response = max(responses, key=lambda r: r['confidence'])
+    def _build_consensus_response(self, responses: List[ModelResponse], consensus_analysis: Dict[str, Any]) -> str:
+        primary_response = max(responses, key=_by_confidence)
 
-        consensus_response = primary_response['response']
+        consensus_response = primary_response.response
 
         common_points = consensus_analysis.get('common_points', [])
         if common_points and len(common_points) >= 3:
@@ -466,10 +665,7 @@ class EnsembleCoordinator:
         if len(sentences) <= 2:
             return response
 
-        key_sentences = []
-        for sentence in sentences:
-            if any(keyword in sentence for keyword in ['重要', '关键', '主要', '核心', '特别']):
-                key_sentences.append(sentence)
+        key_sentences = [sentence for sentence in sentences if _KEY_MARKERS_PATTERN.search(sentence) is not None]
 
         if key_sentences:
             return '。'.join(key_sentences[:2]) + '。'
@@ -477,20 +673,20 @@ class EnsembleCoordinator:
             return sentences[0] + '。' if sentences else response
 
     async def _single_model_inference(self, model_name: str, question: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        await asyncio.sleep(1.0)
+        if self._simulate_latency:
+            await asyncio.sleep(1.0)
 
-        mock_responses = {
-            'qwen-turbo': f"快速回答：关于{question}的基本信息和要点。",
-            'qwen-plus': f"详细分析：{question}涉及多个方面，需要综合考虑相关因素和背景。",
-            'qwen-max': f"深度解答：{question}是一个复杂主题，从理论基础到实际应用都有重要意义。"
-        }
+        template = MOCK_RESPONSE_TEMPLATES.get(model_name, DEFAULT_MOCK_RESPONSE_TEMPLATE)
+        response_text = template.format(question=question)
 
-        response_text = mock_responses.get(model_name, f"关于{question}的回答")
+        scores = self._mock_table.get(model_name)
+        if scores is None:
+            scores = self._mock_table[model_name] = self._mock_scores(model_name)
 
         return {
             'response': response_text,
-            'confidence': 0.8 + hash(model_name) % 20 / 100,
-            'processing_time': 1.0 + hash(model_name) % 30 / 10,
+            'confidence': scores['confidence'],
+            'processing_time': scores['processing_time'],
             'quality_indicators': {
                 'length': len(response_text),
                 'structure_score': 0.7,
@@ -498,6 +694,12 @@ class EnsembleCoordinator:
             }
         }
 
+    def _mock_scores(self, model_name: str) -> Dict[str, float]:
+        return {
+            'confidence': 0.8 + hash(model_name) % 20 / 100,
+            'processing_time': 1.0 + hash(model_name) % 30 / 10
+        }
+
     def _create_empty_response(self) -> Dict[str, Any]:
         return {
             'response': '抱歉，无法生成回答。',
@@ -516,24 +718,32 @@ class EnsembleCoordinator:
             'error': error_message
         }
 
-    def _format_single_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
+    def _format_single_response(self, response: ModelResponse) -> Dict[str, Any]:
         return {
-            'response': response.get('response', ''),
-            'confidence': response.get('confidence', 0.5),
+            'response': response.response,
+            'confidence': response.confidence,
             'ensemble_size': 1,
             'voting_method': 'single',
-            'model': response.get('model', 'unknown'),
-            'processing_time': response.get('processing_time', 0.0)
+            'model': response.model,
+            'processing_time': _processing_time(response, 0.0)
         }
 
-    def _generate_coordination_metadata(self, responses: List[Dict[str, Any]], strategy: str) -> Dict[str, Any]:
-        successful_responses = [r for r in responses if 'error' not in r]
-        failed_responses = [r for r in responses if 'error' in r]
+    def _generate_coordination_metadata(self, responses: List[ModelResponse], strategy: str) -> Dict[str, Any]:
+        successful_count = 0
+        confidence_sum = 0.0
+        processing_time_sum = 0.0
+        model_list = []
 
-        if successful_responses:
-            avg_confidence = sum(r['confidence'] for r in successful_responses) / len(successful_responses)
-            avg_processing_time = sum(r.get('processing_time', 0) for r in successful_responses) / len(
-                successful_responses)
+        for response in responses:
+            model_list.append(response.model)
+            if response.error is None:
+                successful_count += 1
+                confidence_sum += response.confidence
+                processing_time_sum += _processing_time(response, 0.0)
+
+        if successful_count:
+            avg_confidence = confidence_sum / successful_count
+            avg_processing_time = processing_time_sum / successful_count
         else:
             avg_confidence = 0.0
             avg_processing_time = 0.0
@@ -542,10 +752,10 @@ class EnsembleCoordinator:
             'coordination_metadata': {
                 'strategy_used': strategy,
                 'total_models': len(responses),
-                'successful_models': len(successful_responses),
-                'failed_models': len(failed_responses),
+                'successful_models': successful_count,
+                'failed_models': len(responses) - successful_count,
                 'average_confidence': avg_confidence,
                 'average_processing_time': avg_processing_time,
-                'model_list': [r['model'] for r in responses]
+                'model_list': model_list
             }
-        }
\ No newline at end of file
+        }
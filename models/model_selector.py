@@ -1,22 +1,148 @@
-from typing import Dict, Any, List, Optional
+import re
+import sys
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Dict, Any, FrozenSet, List, Optional, Set, Tuple
 from config.models_config import ModelsConfig
 
+PERFORMANCE_HISTORY_SIZE = 100
+# complexity levels 0..5; the fit table is indexed by the estimates from _estimate_complexity_cached (1..4)
+COMPLEXITY_LEVELS = 6
+
+_TECHNICAL_TERMS = frozenset(('算法', '架构', '系统', '优化', '分析', '设计', '实现'))
+_DEPTH_INDICATORS = frozenset(('为什么', '如何实现', '原理', '机制', '深入'))
+
+
+def _compile_terms(terms: FrozenSet[str]) -> 're.Pattern':
+    # lookahead alternation: findall reports every distinct term present, like `term in question`
+    alternation = '|'.join(map(re.escape, sorted(terms, key=lambda term: (-len(term), term))))
+    return re.compile(f'(?=({alternation}))')
+
+
+_TECHNICAL_TERMS_PATTERN = _compile_terms(_TECHNICAL_TERMS)
+_DEPTH_INDICATORS_PATTERN = _compile_terms(_DEPTH_INDICATORS)
+
+# complexity, performance, priority
+_SPEED_SCORING_WEIGHTS = (0.2, 0.6, 0.2)
+_QUALITY_SCORING_WEIGHTS = (0.3, 0.4, 0.3)
+_SECONDARY_SCORING_WEIGHTS = (0.1, 0.7, 0.2)
+_BALANCED_SCORING_WEIGHTS = (0.25, 0.5, 0.25)
+
+
+def _complexity_fit(question_complexity: int, suitable_complexity: Tuple[int, ...]) -> float:
+    if question_complexity in suitable_complexity:
+        return 1.0
+
+    min_distance = min(abs(question_complexity - c) for c in suitable_complexity)
+    return max(0, 1.0 - min_distance * 0.3)
+
+
+def _fit_row(suitable_complexity: Tuple[int, ...]) -> Tuple[float, ...]:
+    return tuple(_complexity_fit(level, suitable_complexity) for level in range(COMPLEXITY_LEVELS))
+
+
+# (speed_score, quality_score, complexity fit per level) assumed for models missing from the config
+_DEFAULT_MODEL_PROFILE = (5, 5, _fit_row((2,)))
+
+# rolling series -> key of its running sum
+_HISTORY_SUMS = {
+    'response_times': 'response_time_sum',
+    'quality_scores': 'quality_score_sum',
+    'success_rates': 'success_rate_sum'
+}
+
+
+def _new_performance_history() -> Dict[str, Any]:
+    history = {series: deque(maxlen=PERFORMANCE_HISTORY_SIZE) for series in _HISTORY_SUMS}
+    history.update((sum_key, 0.0) for sum_key in _HISTORY_SUMS.values())
+    history['total_requests'] = 0
+    return history
+
+
+def _push_history(history: Dict[str, Any], series: str, value: float):
+    values = history[series]
+    sum_key = _HISTORY_SUMS[series]
+    if len(values) == values.maxlen:
+        history[sum_key] -= values[0]
+    values.append(value)
+    history[sum_key] += value
+
+
+def _history_mean(history: Dict[str, Any], series: str, default: float) -> float:
+    count = len(history[series])
+    return history[_HISTORY_SUMS[series]] / count if count else default
+
+
+def _argmax(values: List[float]) -> int:
+    return max(range(len(values)), key=values.__getitem__)
+
+
+@lru_cache(maxsize=4096)
+def _estimate_complexity_cached(question: str) -> int:
+    # approximate word count without building the token list; matches split() for single-spaced text
+    length_score = min((question.count(' ') + 1) / 10, 2)
+
+    technical_score = len(set(_TECHNICAL_TERMS_PATTERN.findall(question)))
+    depth_score = len(set(_DEPTH_INDICATORS_PATTERN.findall(question)))
+
+    total_score = length_score + technical_score + depth_score
+
+    if total_score >= 5:
+        return 4
+    elif total_score >= 3:
+        return 3
+    elif total_score >= 1:
+        return 2
+    else:
+        return 1
+
 
 class ModelSelector:
     def __init__(self):
         self.models_config = ModelsConfig()
+        self._cfg = self.models_config.AVAILABLE_MODELS
         self.performance_history = {}
         self.model_availability = {}
+        # bumped on every performance update; cached recommendations from older versions are stale
+        self.performance_version = 0
+        self.recommendation_cache: OrderedDict = OrderedDict()
+        self.recommendation_cache_size = 256
         self._initialize_availability()
+        self._initialize_model_table()
 
     def _initialize_availability(self):
-        for model_name in self.models_config.AVAILABLE_MODELS:
-            self.model_availability[model_name] = True
+        for model_name in self._cfg:
+            self.model_availability[sys.intern(model_name)] = True
+
+    def _initialize_model_table(self):
+        configs = self._cfg
+
+        self._model_names = [sys.intern(name) for name in configs]
+        self._model_index = {name: i for i, name in enumerate(self._model_names)}
+        self._suitable_complexity = [configs[name].suitable_complexity for name in self._model_names]
+        self._suitable_complexity_sets = [frozenset(levels) for levels in self._suitable_complexity]
+        self._max_suitable_complexity = [max(levels) for levels in self._suitable_complexity]
+        self._fit_table = [_fit_row(levels) for levels in self._suitable_complexity]
+        self._speed_scores = [configs[name].speed_score for name in self._model_names]
+        self._quality_scores = [configs[name].quality_score for name in self._model_names]
+        self._cost_per_token = [configs[name].cost_per_token for name in self._model_names]
+        self._model_profiles = list(zip(self._speed_scores, self._quality_scores, self._fit_table))
+
+        speed = [score / 10.0 for score in self._speed_scores]
+        quality = [score / 10.0 for score in self._quality_scores]
+        cost = [max(0, 1.0 - cost_per_token * 1000) for cost_per_token in self._cost_per_token]
+
+        self._priority_scores = {'speed': speed, 'quality': quality, 'cost': cost}
+        self._balanced_priority_scores = [s * 0.3 + q * 0.5 + c * 0.2 for s, q, c in zip(speed, quality, cost)]
 
     def select_best_model(self, question: str, available_models: List[str], preferences: Dict[str, Any] = None) -> str:
         if not available_models:
             return "qwen-turbo"
 
+        if len(available_models) == 1:
+            # a lone candidate wins whether it scores or is filtered out (the fallback is available_models[0])
+            return available_models[0]
+
         if preferences is None:
             preferences = {"priority": "balanced"}
 
@@ -24,13 +150,12 @@ class ModelSelector:
         priority = preferences.get("priority", "balanced")
 
         candidate_models = self._filter_available_models(available_models)
-        scored_models = self._score_models(candidate_models, complexity, priority, preferences)
+        scored_names, scores = self._score_models(candidate_models, complexity, priority, preferences)
 
-        if not scored_models:
+        if not scores:
             return available_models[0] if available_models else "qwen-turbo"
 
-        best_model = max(scored_models.items(), key=lambda x: x[1])
-        return best_model[0]
+        return scored_names[_argmax(scores)]
 
     def select_primary_model(self, question: str, available_models: List[str]) -> str:
         preferences = {"priority": "quality", "role": "primary"}
@@ -47,20 +172,23 @@ class ModelSelector:
         if len(available_models) <= ensemble_size:
             return available_models
 
+        if ensemble_size <= 1:
+            return [self.select_primary_model(question, available_models)]
+
         complexity = self._estimate_complexity(question)
-        selected_models = []
-        remaining_models = available_models.copy()
+        profiles = [self._model_profile(model) for model in available_models]
 
-        primary_model = self.select_primary_model(question, remaining_models)
-        selected_models.append(primary_model)
-        remaining_models.remove(primary_model)
+        primary_model = self.select_primary_model(question, available_models)
+        selected = [available_models.index(primary_model)]
+        remaining = set(range(len(available_models)))
+        remaining.discard(selected[0])
 
-        for i in range(min(ensemble_size - 1, len(remaining_models))):
-            diverse_model = self._select_diverse_model(selected_models, remaining_models, complexity)
-            selected_models.append(diverse_model)
-            remaining_models.remove(diverse_model)
+        for _ in range(min(ensemble_size - 1, len(remaining))):
+            diverse_idx = self._select_diverse_model(selected, remaining, profiles, complexity)
+            selected.append(diverse_idx)
+            remaining.discard(diverse_idx)
 
-        return selected_models
+        return [available_models[i] for i in selected]
 
     def get_model_recommendation(self, classification_result: Dict[str, Any],
                                  system_constraints: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -75,6 +203,13 @@ class ModelSelector:
         max_time = system_constraints.get('max_response_time', 30.0)
         required_quality = system_constraints.get('min_quality_score', 6)
 
+        cache_key = (complexity, domain, urgency, max_cost, max_time, required_quality)
+        cached = self.recommendation_cache.get(cache_key)
+        if cached is not None and cached[0] == self.performance_version:
+            self.recommendation_cache.move_to_end(cache_key)
+            recommendation = cached[1]
+            return dict(recommendation, alternative_models=list(recommendation['alternative_models']))
+
         suitable_models = self._get_suitable_models(complexity, domain, urgency)
         constrained_models = self._apply_constraints(suitable_models, max_cost, max_time, required_quality)
 
@@ -88,220 +223,192 @@ class ModelSelector:
             'reasoning': self._generate_recommendation_reasoning(complexity, domain, urgency, constrained_models[0])
         }
 
-        return recommendation
+        self.recommendation_cache[cache_key] = (self.performance_version, recommendation)
+        self.recommendation_cache.move_to_end(cache_key)
+        if len(self.recommendation_cache) > self.recommendation_cache_size:
+            self.recommendation_cache.popitem(last=False)
+
+        return dict(recommendation, alternative_models=list(recommendation['alternative_models']))
 
     def update_model_performance(self, model_name: str, performance_data: Dict[str, Any]):
-        if model_name not in self.performance_history:
-            self.performance_history[model_name] = {
-                'response_times': [],
-                'quality_scores': [],
-                'success_rates': [],
-                'total_requests': 0
-            }
-
-        history = self.performance_history[model_name]
+        history = self.performance_history.get(model_name)
+        if history is None:
+            history = self.performance_history[model_name] = _new_performance_history()
+
         history['total_requests'] += 1
+        self.performance_version += 1
 
         if 'response_time' in performance_data:
-            history['response_times'].append(performance_data['response_time'])
-            if len(history['response_times']) > 100:
-                history['response_times'] = history['response_times'][-100:]
+            _push_history(history, 'response_times', performance_data['response_time'])
 
         if 'quality_score' in performance_data:
-            history['quality_scores'].append(performance_data['quality_score'])
-            if len(history['quality_scores']) > 100:
-                history['quality_scores'] = history['quality_scores'][-100:]
+            _push_history(history, 'quality_scores', performance_data['quality_score'])
 
         if 'success' in performance_data:
-            history['success_rates'].append(1.0 if performance_data['success'] else 0.0)
-            if len(history['success_rates']) > 100:
-                history['success_rates'] = history['success_rates'][-100:]
+            _push_history(history, 'success_rates', 1.0 if performance_data['success'] else 0.0)
 
     def get_model_statistics(self, model_name: str) -> Dict[str, Any]:
-        if model_name not in self.performance_history:
-            return {
-                'avg_response_time': 0.0,
-                'avg_quality_score': 0.0,
-                'success_rate': 1.0,
-                'total_requests': 0,
-                'available': self.model_availability.get(model_name, True)
-            }
-
-        history = self.performance_history[model_name]
-
-        avg_response_time = sum(history['response_times']) / len(history['response_times']) if history[
-            'response_times'] else 0.0
-        avg_quality_score = sum(history['quality_scores']) / len(history['quality_scores']) if history[
-            'quality_scores'] else 0.0
-        success_rate = sum(history['success_rates']) / len(history['success_rates']) if history[
-            'success_rates'] else 1.0
+        avg_response_time, avg_quality_score, success_rate, total_requests, available = self._stats_tuple(model_name)
 
         return {
             'avg_response_time': avg_response_time,
             'avg_quality_score': avg_quality_score,
             'success_rate': success_rate,
-            'total_requests': history['total_requests'],
-            'available': self.model_availability.get(model_name, True)
+            'total_requests': total_requests,
+            'available': available
         }
 
+    def _stats_tuple(self, model_name: str) -> Tuple[float, float, float, int, bool]:
+        # (avg_response_time, avg_quality_score, success_rate, total_requests, available)
+        available = self.model_availability.get(model_name, True)
+        history = self.performance_history.get(model_name)
+        if history is None:
+            return 0.0, 0.0, 1.0, 0, available
+
+        return (
+            _history_mean(history, 'response_times', 0.0),
+            _history_mean(history, 'quality_scores', 0.0),
+            _history_mean(history, 'success_rates', 1.0),
+            history['total_requests'],
+            available
+        )
+
     def set_model_availability(self, model_name: str, available: bool):
         self.model_availability[model_name] = available
 
     def _estimate_complexity(self, question: str) -> int:
-        length_score = min(len(question.split()) / 10, 2)
-
-        technical_terms = ['算法', '架构', '系统', '优化', '分析', '设计', '实现']
-        technical_score = sum(1 for term in technical_terms if term in question)
-
-        depth_indicators = ['为什么', '如何实现', '原理', '机制', '深入']
-        depth_score = sum(1 for indicator in depth_indicators if indicator in question)
-
-        total_score = length_score + technical_score + depth_score
-
-        if total_score >= 5:
-            return 4
-        elif total_score >= 3:
-            return 3
-        elif total_score >= 1:
-            return 2
-        else:
-            return 1
+        return _estimate_complexity_cached(question)
 
     def _filter_available_models(self, models: List[str]) -> List[str]:
-        return [model for model in models if self.model_availability.get(model, True)]
+        is_available = self.model_availability.get
+        return [model for model in models if is_available(model, True)]
 
-    def _score_models(self, models: List[str], complexity: int, priority: str, preferences: Dict[str, Any]) -> Dict[
-        str, float]:
-        scores = {}
+    def _score_models(self, models: List[str], complexity: int, priority: str,
+                      preferences: Dict[str, Any]) -> Tuple[List[str], List[float]]:
+        scored_names = []
+        scores = []
+
+        model_index = self._model_index
+        priority_scores = self._priority_scores.get(priority, self._balanced_priority_scores)
+        complexity_weight, performance_weight, priority_weight = self._get_scoring_weights(priority, preferences)
 
         for model_name in models:
-            if model_name not in self.models_config.AVAILABLE_MODELS:
+            i = model_index.get(model_name)
+            if i is None:
                 continue
 
-            model_config = self.models_config.AVAILABLE_MODELS[model_name]
-
-            complexity_fit = self._calculate_complexity_fit(complexity, model_config['suitable_complexity'])
-            performance_score = self._calculate_performance_score(model_name)
-            priority_score = self._calculate_priority_score(model_config, priority)
-
-            weights = self._get_scoring_weights(priority, preferences)
-
-            total_score = (
-                    complexity_fit * weights['complexity'] +
-                    performance_score * weights['performance'] +
-                    priority_score * weights['priority']
+            complexity_fit, performance_score, priority_score = self._compute_model_features(
+                model_name, i, complexity, priority_scores
             )
 
-            scores[model_name] = total_score
-
-        return scores
-
-    def _calculate_complexity_fit(self, question_complexity: int, suitable_complexity: List[int]) -> float:
-        if question_complexity in suitable_complexity:
-            return 1.0
-
-        distances = [abs(question_complexity - c) for c in suitable_complexity]
-        min_distance = min(distances)
-
-        return max(0, 1.0 - min_distance * 0.3)
-
-    def _calculate_performance_score(self, model_name: str) -> float:
-        stats = self.get_model_statistics(model_name)
-
-        if not stats['available']:
-            return 0.0
-
-        if stats['total_requests'] == 0:
-            return 0.8
+            scored_names.append(model_name)
+            scores.append(
+                    complexity_fit * complexity_weight +
+                    performance_score * performance_weight +
+                    priority_score * priority_weight
+            )
 
-        quality_score = stats['avg_quality_score'] / 10.0
-        speed_score = max(0, 1.0 - stats['avg_response_time'] / 30.0)
-        reliability_score = stats['success_rate']
+        return scored_names, scores
 
-        return (quality_score * 0.4 + speed_score * 0.3 + reliability_score * 0.3)
+    def _compute_model_features(self, model_name: str, i: int, complexity: int,
+                                priority_scores: List[float]) -> Tuple[float, float, float]:
+        # (complexity_fit, performance_score, priority_score), in the order of the scoring-weight tuples
+        complexity_fit = self._fit_table[i][complexity]
 
-    def _calculate_priority_score(self, model_config: Dict[str, Any], priority: str) -> float:
-        if priority == "speed":
-            return model_config['speed_score'] / 10.0
-        elif priority == "quality":
-            return model_config['quality_score'] / 10.0
-        elif priority == "cost":
-            return max(0, 1.0 - model_config['cost_per_token'] * 1000)
+        avg_response_time, avg_quality_score, success_rate, total_requests, available = self._stats_tuple(model_name)
+        if not available:
+            performance_score = 0.0
+        elif total_requests == 0:
+            performance_score = 0.8
         else:
-            speed_norm = model_config['speed_score'] / 10.0
-            quality_norm = model_config['quality_score'] / 10.0
-            cost_norm = max(0, 1.0 - model_config['cost_per_token'] * 1000)
+            quality_score = avg_quality_score / 10.0
+            speed_score = max(0, 1.0 - avg_response_time / 30.0)
+            reliability_score = success_rate
+            performance_score = quality_score * 0.4 + speed_score * 0.3 + reliability_score * 0.3
 
-            return speed_norm * 0.3 + quality_norm * 0.5 + cost_norm * 0.2
+        return complexity_fit, performance_score, priority_scores[i]
 
-    def _get_scoring_weights(self, priority: str, preferences: Dict[str, Any]) -> Dict[str, float]:
+    def _get_scoring_weights(self, priority: str, preferences: Dict[str, Any]) -> Tuple[float, float, float]:
         role = preferences.get('role', 'primary')
 
         if priority == "speed":
-            return {'complexity': 0.2, 'performance': 0.6, 'priority': 0.2}
+            return _SPEED_SCORING_WEIGHTS
         elif priority == "quality":
-            return {'complexity': 0.3, 'performance': 0.4, 'priority': 0.3}
+            return _QUALITY_SCORING_WEIGHTS
         elif role == "secondary":
-            return {'complexity': 0.1, 'performance': 0.7, 'priority': 0.2}
+            return _SECONDARY_SCORING_WEIGHTS
         else:
-            return {'complexity': 0.25, 'performance': 0.5, 'priority': 0.25}
+            return _BALANCED_SCORING_WEIGHTS
 
-    def _select_diverse_model(self, selected_models: List[str], remaining_models: List[str], complexity: int) -> str:
-        if not remaining_models:
-            return selected_models[0] if selected_models else "qwen-turbo"
+    def _select_diverse_model(self, selected: List[int], remaining: Set[int],
+                              profiles: List[Tuple[int, int, Tuple[float, ...]]], complexity: int) -> int:
+        # selected/remaining index into `profiles`; scanning in index order keeps ties on the earliest model
+        candidates = sorted(remaining)
+        selected_profiles = [profiles[i][:2] for i in selected]
+        diversity_scores = []
 
-        diversity_scores = {}
+        for i in candidates:
+            speed, quality, fit_row = profiles[i]
 
-        for model in remaining_models:
             diversity_score = 0.0
-            model_config = self.models_config.AVAILABLE_MODELS.get(model, {})
-
-            for selected_model in selected_models:
-                selected_config = self.models_config.AVAILABLE_MODELS.get(selected_model, {})
-
-                speed_diff = abs(model_config.get('speed_score', 5) - selected_config.get('speed_score', 5))
-                quality_diff = abs(model_config.get('quality_score', 5) - selected_config.get('quality_score', 5))
+            for selected_speed, selected_quality in selected_profiles:
+                diversity_score += (abs(speed - selected_speed) + abs(quality - selected_quality)) / 20.0
 
-                diversity_score += (speed_diff + quality_diff) / 20.0
+            complexity_fit = fit_row[complexity]
 
-            complexity_fit = self._calculate_complexity_fit(complexity, model_config.get('suitable_complexity', [2]))
+            diversity_scores.append(diversity_score * 0.7 + complexity_fit * 0.3)
 
-            diversity_scores[model] = diversity_score * 0.7 + complexity_fit * 0.3
+        return candidates[_argmax(diversity_scores)]
 
-        return max(diversity_scores.items(), key=lambda x: x[1])[0]
+    def _model_profile(self, model_name: str) -> Tuple[int, int, Tuple[float, ...]]:
+        i = self._model_index.get(model_name)
+        return _DEFAULT_MODEL_PROFILE if i is None else self._model_profiles[i]
 
     def _get_suitable_models(self, complexity: int, domain: str, urgency: str) -> List[str]:
-        suitable = []
+        max_suitable = self._max_suitable_complexity
+        suitable = [
+            i for i, levels in enumerate(self._suitable_complexity_sets)
+            if complexity in levels or abs(complexity - max_suitable[i]) <= 1
+        ]
 
-        for model_name, config in self.models_config.AVAILABLE_MODELS.items():
-            if complexity in config['suitable_complexity']:
-                suitable.append(model_name)
-            elif abs(complexity - max(config['suitable_complexity'])) <= 1:
-                suitable.append(model_name)
+        if not suitable:
+            return list(self._model_names)
 
         if urgency == "high":
-            suitable.sort(key=lambda m: self.models_config.AVAILABLE_MODELS[m]['speed_score'], reverse=True)
+            suitable.sort(key=self._speed_scores.__getitem__, reverse=True)
         elif domain in ['professional', 'academic']:
-            suitable.sort(key=lambda m: self.models_config.AVAILABLE_MODELS[m]['quality_score'], reverse=True)
+            suitable.sort(key=self._quality_scores.__getitem__, reverse=True)
 
-        return suitable if suitable else list(self.models_config.AVAILABLE_MODELS.keys())
+        model_names = self._model_names
+        return [model_names[i] for i in suitable]
 
     def _apply_constraints(self, models: List[str], max_cost: float, max_time: float, min_quality: int) -> List[str]:
-        constrained = []
+        model_index = self._model_index
+        indices = [model_index[name] for name in models if name in model_index]
+        avg_response_times, total_requests = self._bulk_response_stats(indices)
 
-        for model_name in models:
-            if model_name not in self.models_config.AVAILABLE_MODELS:
-                continue
+        cost = self._cost_per_token
+        quality = self._quality_scores
+
+        return [
+            self._model_names[i]
+            for i, avg_response_time, requests in zip(indices, avg_response_times, total_requests)
+            if cost[i] <= max_cost
+            and (avg_response_time <= max_time or requests == 0)
+            and quality[i] >= min_quality
+        ]
 
-            config = self.models_config.AVAILABLE_MODELS[model_name]
-            stats = self.get_model_statistics(model_name)
+    def _bulk_response_stats(self, indices: List[int]) -> Tuple[List[float], List[int]]:
+        model_names = self._model_names
+        avg_response_times = []
+        total_requests = []
 
-            if config['cost_per_token'] <= max_cost:
-                if stats['avg_response_time'] <= max_time or stats['total_requests'] == 0:
-                    if config['quality_score'] >= min_quality:
-                        constrained.append(model_name)
+        for i in indices:
+            avg_response_time, _, _, requests, _ = self._stats_tuple(model_names[i])
+            avg_response_times.append(avg_response_time)
+            total_requests.append(requests)
 
-        return constrained
+        return avg_response_times, total_requests
 
     def _generate_recommendation_reasoning(self, complexity: int, domain: str, urgency: str,
                                            recommended_model: str) -> str:
@@ -318,7 +425,8 @@ class ModelSelector:
         if domain in ['professional', 'academic']:
             reasoning_parts.append("专业领域问题，优先考虑准确性")
 
-        model_config = self.models_config.AVAILABLE_MODELS.get(recommended_model, {})
-        reasoning_parts.append(f"推荐模型 {recommended_model}，质量评分: {model_config.get('quality_score', 'N/A')}")
+        model_config = self._cfg.get(recommended_model)
+        quality_score = model_config.quality_score if model_config is not None else 'N/A'
+        reasoning_parts.append(f"推荐模型 {recommended_model}，质量评分: {quality_score}")
 
         return "；".join(reasoning_parts)
\ No newline at end of file
@@ -0,0 +1,72 @@
+import unittest
+from tools.calculator_tool import CalculatorTool
+
+
+class TestCalculatorTool(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.calculator = CalculatorTool()
+
+    async def _calculate(self, expression, calculation_type='basic', **params):
+        return await self.calculator.execute({'expression': expression, 'type': calculation_type, **params})
+
+    async def test_basic_arithmetic(self):
+        result = await self._calculate('(2 + 3) * 4')
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['result'], 20.0)
+
+    async def test_scientific_functions(self):
+        result = await self._calculate('sqrt(16) + 2**3', 'scientific')
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['result'], 12.0)
+
+    async def test_scientific_constants_and_math_prefix(self):
+        result = await self._calculate('math.floor(math.pi) + 2 * e', 'scientific')
+
+        self.assertEqual(result['status'], 'success')
+        self.assertAlmostEqual(result['result'], 3 + 2 * 2.718281828459045)
+
+    async def test_rejects_non_finite_spellings(self):
+        for calculation_type in ('basic', 'scientific'):
+            for expression in ('nan', 'inf', '1+inf'):
+                with self.subTest(calculation_type=calculation_type, expression=expression):
+                    result = await self._calculate(expression, calculation_type)
+                    self.assertEqual(result['status'], 'error')
+
+    async def test_rejects_non_whitelisted_nodes(self):
+        expressions = ["__import__('os')", '(1).real', '2 < 3', '[1, 2][0]', 'lambda: 1']
+        for calculation_type in ('basic', 'scientific'):
+            for expression in expressions:
+                with self.subTest(calculation_type=calculation_type, expression=expression):
+                    result = await self._calculate(expression, calculation_type)
+                    self.assertEqual(result['status'], 'error')
+                    self.assertIsNone(result['result'])
+
+    async def test_temperature_conversion(self):
+        cases = [
+            ('fahrenheit', 'kelvin', 98.6, 310.15),
+            ('kelvin', 'fahrenheit', 310.15, 98.6),
+            ('celsius', 'fahrenheit', 100, 212.0),
+            ('fahrenheit', 'celsius', 212, 100.0),
+            ('celsius', 'kelvin', 0, 273.15),
+        ]
+        for from_unit, to_unit, value, expected in cases:
+            with self.subTest(from_unit=from_unit, to_unit=to_unit):
+                result = await self._calculate(str(value), 'unit_conversion', from_unit=from_unit, to_unit=to_unit)
+                self.assertEqual(result['status'], 'success')
+                self.assertAlmostEqual(result['result']['converted_value'], expected, places=9)
+                self.assertEqual(result['result']['category'], 'temperature')
+
+    async def test_linear_unit_conversion_batch(self):
+        result = await self.calculator.execute({
+            'type': 'unit_conversion', 'value': [1, 2.5], 'from_unit': 'km', 'to_unit': 'm'
+        })
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['result']['converted_value'], [1000.0, 2500.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,78 +1,46 @@
 import unittest
-import asyncio
 from core.classifier import MultiDimensionalClassifier
 
 
-class TestMultiDimensionalClassifier(unittest.TestCase):
-    def setUp(self):
-        self.classifier = MultiDimensionalClassifier()
+class TestMultiDimensionalClassifier(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.classifier = MultiDimensionalClassifier()
 
-    def test_simple_question_classification(self):
-        async def run_test():
-            question = "什么是Python?"
-            user_context = {}
-            conversation_history = []
+    async def _classify(self, question, user_context=None):
+        return await self.classifier.classify_question(question, user_context or {}, [])
 
-            result = await self.classifier.classify_question(question, user_context, conversation_history)
+    async def test_simple_question_classification(self):
+        result = await self._classify("什么是Python?")
 
-            self.assertIn('complexity_level', result)
-            self.assertIn('domain_type', result)
-            self.assertIn('urgency_level', result)
-            self.assertLessEqual(result['complexity_level'], 2)
+        for key in ('complexity_level', 'domain_type', 'urgency_level'):
+            with self.subTest(key=key):
+                self.assertIn(key, result)
+        self.assertLessEqual(result['complexity_level'], 2)
 
-        asyncio.run(run_test())
+    async def test_complex_question_classification(self):
+        result = await self._classify("请详细分析深度学习中的注意力机制原理，并解释其在自然语言处理中的应用")
 
-    def test_complex_question_classification(self):
-        async def run_test():
-            question = "请详细分析深度学习中的注意力机制原理，并解释其在自然语言处理中的应用"
-            user_context = {}
-            conversation_history = []
+        self.assertGreaterEqual(result['complexity_level'], 3)
+        self.assertEqual(result['domain_type'], 'professional')
 
-            result = await self.classifier.classify_question(question, user_context, conversation_history)
+    async def test_urgent_question_classification(self):
+        result = await self._classify("紧急！服务器宕机了，如何立即恢复？")
 
-            self.assertGreaterEqual(result['complexity_level'], 3)
-            self.assertEqual(result['domain_type'], 'professional')
+        self.assertEqual(result['urgency_level'], 'high')
+        self.assertTrue(result['requires_tools'])
 
-        asyncio.run(run_test())
+    async def test_tool_requirement_detection(self):
+        result = await self._classify("请搜索最新的AI发展趋势并计算相关数据")
 
-    def test_urgent_question_classification(self):
-        async def run_test():
-            question = "紧急！服务器宕机了，如何立即恢复？"
-            user_context = {}
-            conversation_history = []
+        self.assertTrue(result['requires_tools'])
+        self.assertTrue(result['requires_fresh_data'])
 
-            result = await self.classifier.classify_question(question, user_context, conversation_history)
+    async def test_user_context_influence(self):
+        result = await self._classify("如何优化算法性能？", {'expertise_level': 'expert', 'domains': ['computer_science']})
 
-            self.assertEqual(result['urgency_level'], 'high')
-            self.assertTrue(result['requires_tools'])
-
-        asyncio.run(run_test())
-
-    def test_tool_requirement_detection(self):
-        async def run_test():
-            question = "请搜索最新的AI发展趋势并计算相关数据"
-            user_context = {}
-            conversation_history = []
-
-            result = await self.classifier.classify_question(question, user_context, conversation_history)
-
-            self.assertTrue(result['requires_tools'])
-            self.assertTrue(result['requires_fresh_data'])
-
-        asyncio.run(run_test())
-
-    def test_user_context_influence(self):
-        async def run_test():
-            question = "如何优化算法性能？"
-            user_context = {'expertise_level': 'expert', 'domains': ['computer_science']}
-            conversation_history = []
-
-            result = await self.classifier.classify_question(question, user_context, conversation_history)
-
-            self.assertEqual(result['user_expertise'], 'expert')
-            self.assertIn('recommended_strategy', result)
-
-        asyncio.run(run_test())
+        self.assertEqual(result['user_expertise'], 'expert')
+        self.assertIn('recommended_strategy', result)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,45 @@
+import unittest
+from models.ensemble_coordinator import EnsembleCoordinator
+from data.data_structures import ModelResponse
+
+
+class TestEnsembleCoordinatorGrouping(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.coordinator = EnsembleCoordinator(simulate_latency=False)
+
+    def _group(self, responses):
+        groups = self.coordinator._group_similar_responses(responses, {})
+        return [[response.model for response in group] for group in groups]
+
+    def test_similarity_is_transitive(self):
+        # a~b and b~c clear the threshold, a and c alone do not
+        responses = [
+            ModelResponse(model='a', response='w1 w2 w3 w4 w5'),
+            ModelResponse(model='x', response='zulu yankee xray'),
+            ModelResponse(model='b', response='w2 w3 w4 w5 w6'),
+            ModelResponse(model='c', response='w3 w4 w5 w6 w7'),
+        ]
+
+        self.assertEqual(self._group(responses), [['a', 'b', 'c'], ['x']])
+
+    def test_grouping_ignores_input_order(self):
+        responses = [
+            ModelResponse(model='c', response='w3 w4 w5 w6 w7'),
+            ModelResponse(model='a', response='w1 w2 w3 w4 w5'),
+            ModelResponse(model='b', response='w2 w3 w4 w5 w6'),
+        ]
+
+        self.assertEqual(self._group(responses), [['c', 'a', 'b']])
+
+    def test_failed_responses_are_skipped(self):
+        responses = [
+            ModelResponse(model='a', response='w1 w2 w3 w4 w5'),
+            ModelResponse(model='e', response='w1 w2 w3 w4 w5', error='timeout'),
+        ]
+
+        self.assertEqual(self._group(responses), [['a']])
+
+
+if __name__ == '__main__':
+    unittest.main()
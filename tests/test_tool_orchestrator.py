@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+from tools.tool_orchestrator import IntelligentToolOrchestrator, ToolDependencyGraph
+from tools.tool_registry import BaseTool
+
+
+class RecordingTool(BaseTool):
+    def __init__(self, name: str, calls: list, fail: bool = False, delay: float = 0.0, broken_validator: bool = False):
+        super().__init__(name, name)
+        self.calls = calls
+        self.fail = fail
+        self.delay = delay
+        self.broken_validator = broken_validator
+        self.retry_count = 0
+
+    async def execute(self, params):
+        self.calls.append(self.name)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        return {'tool': self.name}
+
+    def validate_params(self, params):
+        if self.broken_validator:
+            raise KeyError('expression')
+        return True
+
+
+class TestToolOrchestratorDispatch(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.orchestrator = IntelligentToolOrchestrator()
+        self.calls = []
+
+    async def _run(self, spec, failing=(), delay=0.0, broken_validators=()):
+        tool_graph = ToolDependencyGraph()
+        for name, input_deps in spec:
+            tool = RecordingTool(name, self.calls, fail=name in failing, delay=delay,
+                                 broken_validator=name in broken_validators)
+            tool_graph.add_tool(tool, input_deps, [])
+        plan = self.orchestrator.generate_execution_plan(tool_graph, {'question': 'q'})
+        return await self.orchestrator.execute_plan(plan)
+
+    async def test_dependencies_run_first(self):
+        results = await self._run([('b', ['a']), ('a', [])])
+
+        self.assertEqual(self.calls, ['a', 'b'])
+        self.assertTrue(all(result['success'] for result in results.values()))
+
+    async def test_pure_cycle_runs_every_tool_once(self):
+        results = await self._run([('a', ['b']), ('b', ['a'])])
+
+        self.assertEqual(sorted(self.calls), ['a', 'b'])
+        self.assertEqual(set(results), {'a', 'b'})
+
+    async def test_partial_cycle_runs_every_tool_once(self):
+        await self._run([('c', []), ('a', ['b', 'c']), ('b', ['a'])])
+
+        self.assertEqual(sorted(self.calls), ['a', 'b', 'c'])
+
+    async def test_failed_tool_releases_dependents(self):
+        results = await self._run([('a', []), ('b', ['a'])], failing=('a',))
+
+        self.assertEqual(self.calls, ['a', 'b'])
+        self.assertFalse(results['a']['success'])
+        self.assertTrue(results['b']['success'])
+
+    async def test_validator_error_fails_only_that_tool(self):
+        results = await self._run([('a', []), ('b', [])], broken_validators=('a',))
+
+        self.assertEqual(self.calls, ['b'])
+        self.assertFalse(results['a']['success'])
+        self.assertIn('expression', results['a']['error'])
+        self.assertTrue(results['b']['success'])
+
+    async def test_cancellation_cancels_running_tools(self):
+        execution = asyncio.create_task(self._run([('a', []), ('b', [])], delay=10.0))
+        await asyncio.sleep(0.01)
+        execution.cancel()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await execution
+
+        tool_tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        self.assertTrue(tool_tasks)
+        _, pending = await asyncio.wait(tool_tasks, timeout=1.0)
+        self.assertFalse(pending)
+        self.assertTrue(all(task.cancelled() for task in tool_tasks))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,134 @@
-import asyncio
+import ast
 import re
 import math
-from typing import Dict, Any
+from functools import lru_cache, partial
+from itertools import product
+from types import CodeType
+from typing import Callable, Dict, Any, List, Mapping, Optional, Tuple, Union
 from .tool_registry import BaseTool
 
+_BASIC_FUNCTIONS = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "sum": sum,
+    "pow": pow
+}
+# bound by name, so asinh or sinh are never mistaken for sin the way substring rewriting did
+_MATH_FUNCTION_NAMES = (
+    'sin', 'cos', 'tan', 'log', 'exp', 'sqrt',
+    'asin', 'acos', 'atan', 'sinh', 'cosh', 'tanh',
+    'floor', 'ceil', 'fabs', 'log10', 'log2', 'factorial', 'degrees', 'radians', 'hypot'
+)
+_MATH_CONSTANT_NAMES = ('pi', 'e', 'tau')
+_SCIENTIFIC_FUNCTIONS = {
+    **_BASIC_FUNCTIONS,
+    **{name: getattr(math, name) for name in _MATH_FUNCTION_NAMES + _MATH_CONSTANT_NAMES}
+}
+
+# eval globals, built once; expressions are checked against _ALLOWED_NODES before they get here
+_BASIC_GLOBALS = {"__builtins__": {}, **_BASIC_FUNCTIONS}
+_SCIENTIFIC_GLOBALS = {"__builtins__": {}, **_SCIENTIFIC_FUNCTIONS}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Call, ast.Name, ast.Load, ast.List, ast.Tuple,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Pow, ast.Mod, ast.USub, ast.UAdd
+)
+
+_IMPLICIT_MULTIPLICATION = re.compile(r'(\d)([a-zA-Z])')
+# 'math.pi' / 'math.floor(x)' resolve to the bare names above; other math attributes stay unsupported
+_MATH_PREFIX = re.compile(r'(?<![\w.])math\.')
+# digits, operators, brackets, argument separators and function names
+_SAFE_EXPRESSION = re.compile(r'[0-9+\-*/().,\[\]^%a-zA-Z \t]+')
+
+
+def _normalize_basic(expression: str) -> str:
+    return _IMPLICIT_MULTIPLICATION.sub(r'\1*\2', expression.replace('^', '**'))
+
+
+def _compile_checked(expression: str, names: Mapping[str, Any]) -> CodeType:
+    tree = ast.parse(expression.strip(), mode='eval')
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Unsupported expression element: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError(f"Unsupported constant: {node.value!r}")
+        if isinstance(node, ast.Name) and node.id not in names:
+            raise ValueError(f"Unknown name: {node.id}")
+
+    return compile(tree, '<calc>', 'eval')
+
+
+# unit -> size in the category's base unit
+_LINEAR_UNITS = {
+    'length': {
+        'm': 1.0,
+        'cm': 0.01,
+        'mm': 0.001,
+        'km': 1000.0,
+        'inch': 0.0254,
+        'ft': 0.3048,
+        'yard': 0.9144
+    },
+    'weight': {
+        'kg': 1.0,
+        'g': 0.001,
+        'lb': 0.453592,
+        'oz': 0.0283495
+    }
+}
+
+_TEMPERATURE_CONVERTERS = {
+    ('celsius', 'fahrenheit'): lambda value: value * 9 / 5 + 32,
+    ('fahrenheit', 'celsius'): lambda value: (value - 32) * 5 / 9,
+    ('celsius', 'kelvin'): lambda value: value + 273.15,
+    ('kelvin', 'celsius'): lambda value: value - 273.15,
+    ('fahrenheit', 'kelvin'): lambda value: (value - 32) * 5 / 9 + 273.15,
+    ('kelvin', 'fahrenheit'): lambda value: (value - 273.15) * 9 / 5 + 32,
+    ('celsius', 'celsius'): lambda value: value,
+    ('fahrenheit', 'fahrenheit'): lambda value: value,
+    ('kelvin', 'kelvin'): lambda value: value
+}
+
+
+def _linear(from_factor: float, to_factor: float, value: float) -> float:
+    return value * from_factor / to_factor
+
+
+def _build_converters() -> Dict[Tuple[str, str], Tuple[str, Callable[[float], float]]]:
+    converters = {}
+    for category, units in _LINEAR_UNITS.items():
+        for from_unit, to_unit in product(units, repeat=2):
+            converters[(from_unit, to_unit)] = (category, partial(_linear, units[from_unit], units[to_unit]))
+    for pair, convert in _TEMPERATURE_CONVERTERS.items():
+        converters[pair] = ('temperature', convert)
+    return converters
+
+
+# (from_unit, to_unit) -> (category, converter)
+_CONVERTERS = _build_converters()
+
+
+def _parse_number(expression: str) -> Optional[float]:
+    try:
+        value = float(expression)
+    except ValueError:
+        return None
+    # 'nan'/'inf' spellings fall through to the expression path, which rejects them
+    return value if math.isfinite(value) else None
+
+
+@lru_cache(maxsize=4096)
+def _compile_basic(expression: str) -> CodeType:
+    return _compile_checked(_normalize_basic(expression), _BASIC_FUNCTIONS)
+
+
+@lru_cache(maxsize=4096)
+def _compile_scientific(expression: str) -> CodeType:
+    return _compile_checked(_MATH_PREFIX.sub('', expression).replace('^', '**'), _SCIENTIFIC_FUNCTIONS)
+
 
 class CalculatorTool(BaseTool):
     def __init__(self):
@@ -47,121 +172,59 @@ class CalculatorTool(BaseTool):
             }
 
     def validate_params(self, params: Dict[str, Any]) -> bool:
+        if params.get('type') == 'unit_conversion' and isinstance(params.get('value'), (list, tuple)):
+            return True
+
         expression = params.get('expression', '')
         if not expression or not isinstance(expression, str):
             return False
 
-        safe_chars = set('0123456789+-*/().^%sincostan logexpqrt ')
-        if not all(c.lower() in safe_chars for c in expression.replace(' ', '')):
-            return True
-
-        return True
+        return _SAFE_EXPRESSION.fullmatch(expression) is not None
 
     async def _basic_calculation(self, expression: str) -> float:
-        await asyncio.sleep(0.1)
-
-        expression = expression.replace('^', '**')
-        expression = re.sub(r'(\d)([a-zA-Z])', r'\1*\2', expression)
-
-        safe_dict = {
-            "__builtins__": {},
-            "abs": abs,
-            "round": round,
-            "min": min,
-            "max": max,
-            "sum": sum,
-            "pow": pow
-        }
+        number = _parse_number(expression)
+        if number is not None:
+            return number
 
         try:
-            result = eval(expression, safe_dict)
-            return float(result)
-        except:
-            return self._parse_math_expression(expression)
+            return float(eval(_compile_basic(expression), _BASIC_GLOBALS))
+        except Exception:
+            result = self._parse_math_expression(_normalize_basic(expression))
+        # float() in the string fallback would otherwise accept 'nan'/'inf'
+        if not math.isfinite(result):
+            raise ValueError(f"Unsupported number in expression: {expression}")
+        return result
 
     async def _scientific_calculation(self, expression: str) -> float:
-        await asyncio.sleep(0.2)
-
-        expression = expression.replace('^', '**')
-        expression = expression.replace('sin', 'math.sin')
-        expression = expression.replace('cos', 'math.cos')
-        expression = expression.replace('tan', 'math.tan')
-        expression = expression.replace('log', 'math.log')
-        expression = expression.replace('exp', 'math.exp')
-        expression = expression.replace('sqrt', 'math.sqrt')
-
-        safe_dict = {
-            "__builtins__": {},
-            "math": math,
-            "abs": abs,
-            "round": round,
-            "min": min,
-            "max": max,
-            "sum": sum,
-            "pow": pow
-        }
+        number = _parse_number(expression)
+        if number is not None:
+            return number
 
-        result = eval(expression, safe_dict)
-        return float(result)
+        return float(eval(_compile_scientific(expression), _SCIENTIFIC_GLOBALS))
 
     async def _unit_conversion(self, expression: str, params: Dict[str, Any]) -> Dict[str, Any]:
-        await asyncio.sleep(0.1)
-
         from_unit = params.get('from_unit', '')
         to_unit = params.get('to_unit', '')
-        value = float(expression)
-
-        conversion_factors = {
-            'length': {
-                'm': 1.0,
-                'cm': 0.01,
-                'mm': 0.001,
-                'km': 1000.0,
-                'inch': 0.0254,
-                'ft': 0.3048,
-                'yard': 0.9144
-            },
-            'weight': {
-                'kg': 1.0,
-                'g': 0.001,
-                'lb': 0.453592,
-                'oz': 0.0283495
-            },
-            'temperature': {
-                'celsius': lambda c: c,
-                'fahrenheit': lambda f: (f - 32) * 5 / 9,
-                'kelvin': lambda k: k - 273.15
-            }
+        # a list under params['value'] converts a batch with one dispatch; otherwise the expression is the value
+        values = params.get('value')
+        batch = isinstance(values, (list, tuple))
+        value: Union[float, List[float]] = [float(v) for v in values] if batch else float(expression)
+
+        converter = _CONVERTERS.get((from_unit, to_unit))
+        if converter is None:
+            raise ValueError(f"Unsupported unit conversion: {from_unit} to {to_unit}")
+
+        category, convert = converter
+        result = [convert(v) for v in value] if batch else convert(value)
+
+        return {
+            'converted_value': result,
+            'original_value': value,
+            'from_unit': from_unit,
+            'to_unit': to_unit,
+            'category': category
         }
 
-        for category, units in conversion_factors.items():
-            if from_unit in units and to_unit in units:
-                if category == 'temperature':
-                    if from_unit == 'celsius' and to_unit == 'fahrenheit':
-                        result = value * 9 / 5 + 32
-                    elif from_unit == 'fahrenheit' and to_unit == 'celsius':
-                        result = (value - 32) * 5 / 9
-                    elif from_unit == 'celsius' and to_unit == 'kelvin':
-                        result = value + 273.15
-                    elif from_unit == 'kelvin' and to_unit == 'celsius':
-                        result = value - 273.15
-                    else:
-                        result = value
-                else:
-                    from_factor = units[from_unit]
-                    to_factor = units[to_unit]
-                    result = value * from_factor / to_factor
-
-                return {
-                    'converted_value': result,
-                    'original_value': value,
-                    'from_unit': from_unit,
-                    'to_unit': to_unit,
-                    'category': category
-                }
-
-        raise ValueError(f"Unsupported unit conversion: {from_unit} to {to_unit}")
-
     def _parse_math_expression(self, expression: str) -> float:
         expression = expression.replace(' ', '')
 
@@ -1,9 +1,139 @@
 import asyncio
 import json
+import time
+from collections import OrderedDict
+from itertools import islice
 import aiohttp
 from typing import Dict, Any, List, Optional
+from utils.logging_utils import get_logger
 from .tool_registry import BaseTool
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+# fixed part of the multi_match clause; only the query text varies per request
+_ES_MULTI_MATCH_OPTIONS = {
+    "fields": ("title^2", "content", "keywords"),
+    "type": "best_fields",
+    "fuzziness": "AUTO"
+}
+# trim the search response to what _elasticsearch_hit reads, so less JSON is buffered and parsed
+_ES_SOURCE_FIELDS = ("title", "content", "keywords", "source", "type", "date")
+_ES_FILTER_PATH = {"filter_path": "took,hits.hits._id,hits.hits._score,hits.hits._source"}
+# failures that mean "backend unavailable"; ValueError covers undecodable response bodies
+_BACKEND_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ValueError)
+
+logger = get_logger('rag_retrieval')
+
+# weight of the newest sample in the per-backend latency average
+BACKEND_LATENCY_ALPHA = 0.2
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def _loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _mcp_hit(hit: Dict[str, Any]) -> Dict[str, Any]:
+    get = hit.get
+    return {
+        "id": get("id", ""),
+        "title": get("title", ""),
+        "content": get("content", ""),
+        "keywords": get("keywords", []),
+        "source": get("source", "MCP"),
+        "document_type": get("type", "unknown"),
+        "created_date": get("date", ""),
+        "confidence_score": get("score", 0.0),
+        "relevance_score": get("relevance", 0.0)
+    }
+
+
+def _elasticsearch_hit(hit: Dict[str, Any]) -> Dict[str, Any]:
+    source_get = hit.get("_source", {}).get
+    score = hit.get("_score", 0.0) / 10.0
+    return {
+        "id": hit.get("_id", ""),
+        "title": source_get("title", ""),
+        "content": source_get("content", ""),
+        "keywords": source_get("keywords", []),
+        "source": source_get("source", "Elasticsearch"),
+        "document_type": source_get("type", "unknown"),
+        "created_date": source_get("date", ""),
+        "confidence_score": score,
+        "relevance_score": score
+    }
+
+
+# {query} is filled per call; keywords are prefixed with the query
+MOCK_DOCUMENT_TEMPLATES = [
+    {
+        "id": "doc_001",
+        "title": "关于{query}的详细说明",
+        "content": "这是关于{query}的详细文档内容。包含了定义、原理、应用场景等重要信息。{query}在现代技术发展中扮演着重要角色，其应用范围广泛，涉及多个领域。",
+        "keywords": ("技术", "应用", "原理"),
+        "source": "内部知识库",
+        "document_type": "技术文档",
+        "created_date": "2024-11-15",
+        "confidence_score": 0.95,
+        "relevance_score": 0.92
+    },
+    {
+        "id": "doc_002",
+        "title": "{query}实践指南",
+        "content": "{query}的实际应用需要考虑多个因素。本指南提供了详细的实施步骤和最佳实践。通过遵循这些指导原则，可以有效地实现{query}相关的项目目标。",
+        "keywords": ("实践", "指南", "步骤"),
+        "source": "实践手册",
+        "document_type": "操作指南",
+        "created_date": "2024-11-10",
+        "confidence_score": 0.88,
+        "relevance_score": 0.85
+    },
+    {
+        "id": "doc_003",
+        "title": "{query}常见问题解答",
+        "content": "用户在使用{query}过程中经常遇到的问题及其解决方案。包括常见错误、故障排除和性能优化建议。这些信息基于大量用户反馈和技术支持经验总结而来。",
+        "keywords": ("问题", "解答", "故障排除"),
+        "source": "FAQ数据库",
+        "document_type": "FAQ",
+        "created_date": "2024-11-05",
+        "confidence_score": 0.82,
+        "relevance_score": 0.80
+    },
+    {
+        "id": "doc_004",
+        "title": "{query}发展历史和趋势",
+        "content": "{query}的发展经历了多个重要阶段。从早期的概念提出到现在的广泛应用，{query}技术不断演进。未来发展趋势显示，{query}将在更多领域发挥重要作用。",
+        "keywords": ("历史", "发展", "趋势"),
+        "source": "行业报告",
+        "document_type": "研究报告",
+        "created_date": "2024-10-28",
+        "confidence_score": 0.75,
+        "relevance_score": 0.72
+    },
+    {
+        "id": "doc_005",
+        "title": "{query}相关工具和资源",
+        "content": "支持{query}的各种工具和资源汇总。包括开源软件、商业解决方案、学习资料和社区资源。这些工具可以帮助用户更好地理解和应用{query}技术。",
+        "keywords": ("工具", "资源", "软件"),
+        "source": "资源库",
+        "document_type": "资源列表",
+        "created_date": "2024-10-20",
+        "confidence_score": 0.70,
+        "relevance_score": 0.68
+    }
+]
+
 
 class RAGRetrievalTool(BaseTool):
     def __init__(self):
@@ -21,6 +151,14 @@ class RAGRetrievalTool(BaseTool):
         self.index_name = "qa_knowledge_base"
         self.mcp_server_url = "http://localhost:8080"
 
+        self.mock_cache: OrderedDict = OrderedDict()
+        self.mock_cache_size = 512
+        # backend name -> exponentially weighted wall-clock latency of successful searches
+        self.backend_latency: Dict[str, float] = {}
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
     async def execute(self, params: Dict[str, Any]) -> Dict[str, Any]:
         query = params.get('query', '')
         top_k = params.get('top_k', 10)
@@ -31,9 +169,34 @@ class RAGRetrievalTool(BaseTool):
             return await self._mcp_retrieval(query, top_k, confidence_threshold)
         elif search_type == 'elasticsearch':
             return await self._elasticsearch_retrieval(query, top_k, confidence_threshold)
+        elif search_type == 'auto':
+            return await self._auto_retrieval(query, top_k, confidence_threshold)
         else:
             return await self._mock_retrieval(query, top_k, confidence_threshold)
 
+    async def close(self):
+        session = self._session
+        self._session = None
+        self._session_loop = None
+        if session is not None and not session.closed:
+            try:
+                await session.close()
+            except RuntimeError:
+                # the loop that owned the session's connections is already closed
+                pass
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # sessions are bound to the loop that created them, so a new loop gets a new session
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            await self.close()
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=16, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._session_loop = loop
+        return self._session
+
     def validate_params(self, params: Dict[str, Any]) -> bool:
         required_params = ['query']
         for param in required_params:
@@ -66,189 +229,182 @@ class RAGRetrievalTool(BaseTool):
         result = await self.execute(params)
         return result.get('results', [])
 
-    async def _mcp_retrieval(self, query: str, top_k: int, confidence_threshold: float) -> Dict[str, Any]:
+    def _timed(self, result: Dict[str, Any], backend: str, start_time: float) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - start_time
+        self._record_latency(backend, elapsed)
+        result["retrieval_time"] = elapsed
+        return result
+
+    def _record_latency(self, backend: str, elapsed: float):
+        previous = self.backend_latency.get(backend)
+        self.backend_latency[backend] = elapsed if previous is None else (
+            previous + BACKEND_LATENCY_ALPHA * (elapsed - previous)
+        )
+
+    async def _auto_retrieval(self, query: str, top_k: int, confidence_threshold: float) -> Dict[str, Any]:
+        # race the raw backends: their mock fallbacks would otherwise win against a live backend
+        searches = {'mcp': self._mcp_search, 'elasticsearch': self._elasticsearch_search}
+        preferred, *waiting = sorted(searches, key=lambda backend: self.backend_latency.get(backend, 0.0))
+        # once both latencies are known, the historically faster backend gets its typical latency as a
+        # head start and the slower one is only queried if that passes without an answer
+        head_start = self.backend_latency.get(preferred, 0.0) if len(self.backend_latency) >= len(searches) else 0.0
+        pending = set()
+
+        def start(backend: str):
+            pending.add(asyncio.create_task(searches[backend](query, top_k, confidence_threshold)))
+
+        start(preferred)
+        if head_start <= 0.0:
+            for backend in waiting:
+                start(backend)
+            waiting = []
+        answered = None
+
         try:
-            payload = {
-                "method": "search",
-                "params": {
-                    "query": query,
-                    "top_k": top_k,
-                    "threshold": confidence_threshold,
-                    "index": self.index_name
-                }
-            }
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=head_start if waiting else None,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is not None:
+                        if not isinstance(error, _BACKEND_ERRORS):
+                            raise error
+                        logger.warning(f"Retrieval backend failed during auto search: {error!r}")
+                        continue
+                    result = task.result()
+                    if result.get('results'):
+                        return result
+                    answered = result
+                # head start over, or the preferred backend came back empty or failed
+                if waiting:
+                    start(waiting.pop(0))
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if answered is not None:
+            return answered
+        return await self._mock_retrieval(query, top_k, confidence_threshold)
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                        f"{self.mcp_server_url}/search",
-                        json=payload,
-                        timeout=aiohttp.ClientTimeout(total=self.timeout)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_mcp_results(data, query)
-                    else:
-                        raise Exception(f"MCP server error: {response.status}")
-
-        except Exception as e:
+    async def _mcp_retrieval(self, query: str, top_k: int, confidence_threshold: float) -> Dict[str, Any]:
+        try:
+            return await self._mcp_search(query, top_k, confidence_threshold)
+        except _BACKEND_ERRORS as e:
+            logger.warning(f"MCP retrieval failed, using mock results: {e!r}")
             return await self._mock_retrieval(query, top_k, confidence_threshold)
 
     async def _elasticsearch_retrieval(self, query: str, top_k: int, confidence_threshold: float) -> Dict[str, Any]:
         try:
-            es_query = {
-                "query": {
-                    "multi_match": {
-                        "query": query,
-                        "fields": ["title^2", "content", "keywords"],
-                        "type": "best_fields",
-                        "fuzziness": "AUTO"
-                    }
-                },
-                "size": top_k,
-                "min_score": confidence_threshold
+            return await self._elasticsearch_search(query, top_k, confidence_threshold)
+        except _BACKEND_ERRORS as e:
+            logger.warning(f"Elasticsearch retrieval failed, using mock results: {e!r}")
+            return await self._mock_retrieval(query, top_k, confidence_threshold)
+
+    async def _mcp_search(self, query: str, top_k: int, confidence_threshold: float) -> Dict[str, Any]:
+        payload = {
+            "method": "search",
+            "params": {
+                "query": query,
+                "top_k": top_k,
+                "threshold": confidence_threshold,
+                "index": self.index_name
             }
+        }
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                        f"{self.elasticsearch_url}/{self.index_name}/_search",
-                        json=es_query,
-                        timeout=aiohttp.ClientTimeout(total=self.timeout)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_elasticsearch_results(data, query)
-                    else:
-                        raise Exception(f"Elasticsearch error: {response.status}")
-
-        except Exception as e:
-            return await self._mock_retrieval(query, top_k, confidence_threshold)
+        start_time = time.perf_counter()
+        session = await self._get_session()
+        async with session.post(f"{self.mcp_server_url}/search", data=_dumps(payload),
+                                headers=_JSON_HEADERS) as response:
+            if response.status == 200:
+                data = _loads(await response.read())
+                return self._timed(self._parse_mcp_results(data, query), 'mcp', start_time)
+            else:
+                raise aiohttp.ClientResponseError(
+                    response.request_info, response.history,
+                    status=response.status, message=f"MCP server error: {response.status}"
+                )
+
+    async def _elasticsearch_search(self, query: str, top_k: int, confidence_threshold: float) -> Dict[str, Any]:
+        es_query = {
+            "query": {"multi_match": {"query": query, **_ES_MULTI_MATCH_OPTIONS}},
+            "size": top_k,
+            "min_score": confidence_threshold,
+            "_source": _ES_SOURCE_FIELDS
+        }
+
+        start_time = time.perf_counter()
+        session = await self._get_session()
+        async with session.post(f"{self.elasticsearch_url}/{self.index_name}/_search", data=_dumps(es_query),
+                                headers=_JSON_HEADERS, params=_ES_FILTER_PATH) as response:
+            if response.status == 200:
+                data = _loads(await response.read())
+                return self._timed(self._parse_elasticsearch_results(data, query), 'elasticsearch', start_time)
+            else:
+                raise aiohttp.ClientResponseError(
+                    response.request_info, response.history,
+                    status=response.status, message=f"Elasticsearch error: {response.status}"
+                )
 
     async def _mock_retrieval(self, query: str, top_k: int, confidence_threshold: float) -> Dict[str, Any]:
-        await asyncio.sleep(0.5)
+        start_time = time.perf_counter()
+        cache_key = (query, top_k, confidence_threshold)
+        cached = self.mock_cache.get(cache_key)
+        if cached is None:
+            cached = self._build_mock_retrieval(query, top_k, confidence_threshold)
+            self.mock_cache[cache_key] = cached
+            if len(self.mock_cache) > self.mock_cache_size:
+                self.mock_cache.popitem(last=False)
+        else:
+            self.mock_cache.move_to_end(cache_key)
 
-        mock_documents = [
-            {
-                "id": "doc_001",
-                "title": f"关于{query}的详细说明",
-                "content": f"这是关于{query}的详细文档内容。包含了定义、原理、应用场景等重要信息。{query}在现代技术发展中扮演着重要角色，其应用范围广泛，涉及多个领域。",
-                "keywords": [query, "技术", "应用", "原理"],
-                "source": "内部知识库",
-                "document_type": "技术文档",
-                "created_date": "2024-11-15",
-                "confidence_score": 0.95,
-                "relevance_score": 0.92
-            },
-            {
-                "id": "doc_002",
-                "title": f"{query}实践指南",
-                "content": f"{query}的实际应用需要考虑多个因素。本指南提供了详细的实施步骤和最佳实践。通过遵循这些指导原则，可以有效地实现{query}相关的项目目标。",
-                "keywords": [query, "实践", "指南", "步骤"],
-                "source": "实践手册",
-                "document_type": "操作指南",
-                "created_date": "2024-11-10",
-                "confidence_score": 0.88,
-                "relevance_score": 0.85
-            },
-            {
-                "id": "doc_003",
-                "title": f"{query}常见问题解答",
-                "content": f"用户在使用{query}过程中经常遇到的问题及其解决方案。包括常见错误、故障排除和性能优化建议。这些信息基于大量用户反馈和技术支持经验总结而来。",
-                "keywords": [query, "问题", "解答", "故障排除"],
-                "source": "FAQ数据库",
-                "document_type": "FAQ",
-                "created_date": "2024-11-05",
-                "confidence_score": 0.82,
-                "relevance_score": 0.80
-            },
-            {
-                "id": "doc_004",
-                "title": f"{query}发展历史和趋势",
-                "content": f"{query}的发展经历了多个重要阶段。从早期的概念提出到现在的广泛应用，{query}技术不断演进。未来发展趋势显示，{query}将在更多领域发挥重要作用。",
-                "keywords": [query, "历史", "发展", "趋势"],
-                "source": "行业报告",
-                "document_type": "研究报告",
-                "created_date": "2024-10-28",
-                "confidence_score": 0.75,
-                "relevance_score": 0.72
-            },
+        # hits are copied too so callers cannot mutate the cached documents
+        results = [dict(doc, keywords=list(doc['keywords'])) for doc in cached['results']]
+        return dict(cached, results=results, confidence_threshold=confidence_threshold,
+                    retrieval_time=time.perf_counter() - start_time)
+
+    def _build_mock_retrieval(self, query: str, top_k: int, confidence_threshold: float) -> Dict[str, Any]:
+        filtered_docs = islice(
+            (template for template in MOCK_DOCUMENT_TEMPLATES if template['confidence_score'] >= confidence_threshold),
+            top_k
+        )
+
+        selected_docs = [
             {
-                "id": "doc_005",
-                "title": f"{query}相关工具和资源",
-                "content": f"支持{query}的各种工具和资源汇总。包括开源软件、商业解决方案、学习资料和社区资源。这些工具可以帮助用户更好地理解和应用{query}技术。",
-                "keywords": [query, "工具", "资源", "软件"],
-                "source": "资源库",
-                "document_type": "资源列表",
-                "created_date": "2024-10-20",
-                "confidence_score": 0.70,
-                "relevance_score": 0.68
+                **template,
+                "title": template["title"].format(query=query),
+                "content": template["content"].format(query=query),
+                "keywords": [query, *template["keywords"]]
             }
+            for template in filtered_docs
         ]
 
-        filtered_docs = [
-            doc for doc in mock_documents
-            if doc['confidence_score'] >= confidence_threshold
-        ]
-
-        selected_docs = filtered_docs[:top_k]
-
         return {
             "results": selected_docs,
             "total_results": len(selected_docs),
             "search_query": query,
-            "retrieval_time": 0.5,
+            "retrieval_time": 0.0,
             "confidence_threshold": confidence_threshold,
             "status": "success"
         }
 
     def _parse_mcp_results(self, data: Dict[str, Any], query: str) -> Dict[str, Any]:
-        results = []
-
-        hits = data.get("results", [])
-
-        for hit in hits:
-            results.append({
-                "id": hit.get("id", ""),
-                "title": hit.get("title", ""),
-                "content": hit.get("content", ""),
-                "keywords": hit.get("keywords", []),
-                "source": hit.get("source", "MCP"),
-                "document_type": hit.get("type", "unknown"),
-                "created_date": hit.get("date", ""),
-                "confidence_score": hit.get("score", 0.0),
-                "relevance_score": hit.get("relevance", 0.0)
-            })
+        results = list(map(_mcp_hit, data.get("results", [])))
 
         return {
             "results": results,
             "total_results": len(results),
             "search_query": query,
-            "retrieval_time": data.get("search_time", 1.0),
+            "backend_time": data.get("search_time", 1.0),
             "status": "success"
         }
 
     def _parse_elasticsearch_results(self, data: Dict[str, Any], query: str) -> Dict[str, Any]:
-        results = []
-
-        hits = data.get("hits", {}).get("hits", [])
-
-        for hit in hits:
-            source = hit.get("_source", {})
-            results.append({
-                "id": hit.get("_id", ""),
-                "title": source.get("title", ""),
-                "content": source.get("content", ""),
-                "keywords": source.get("keywords", []),
-                "source": source.get("source", "Elasticsearch"),
-                "document_type": source.get("type", "unknown"),
-                "created_date": source.get("date", ""),
-                "confidence_score": hit.get("_score", 0.0) / 10.0,
-                "relevance_score": hit.get("_score", 0.0) / 10.0
-            })
+        results = list(map(_elasticsearch_hit, data.get("hits", {}).get("hits", [])))
 
         return {
             "results": results,
             "total_results": len(results),
             "search_query": query,
-            "retrieval_time": data.get("took", 100) / 1000.0,
+            "backend_time": data.get("took", 100) / 1000.0,
             "status": "success"
         }
\ No newline at end of file
@@ -1,76 +1,173 @@
 import asyncio
+import heapq
+import itertools
+import re
 import time
-from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional, Tuple, Callable
 from .tool_registry import ToolRegistry, BaseTool
 
+# (pattern, group holding the expression)
+_MATH_EXPRESSION_PATTERNS = (
+    (re.compile(r'(\d+(?:\.\d+)?)\s*[\+\-\*\/]\s*(\d+(?:\.\d+)?)'), 0),
+    (re.compile(r'计算\s*(.+)'), 1),
+    (re.compile(r'求\s*(.+)'), 0),
+)
+
+
+def _extract_math_expression(question: str) -> str:
+    for pattern, group in _MATH_EXPRESSION_PATTERNS:
+        match = pattern.search(question)
+        if match:
+            return match.group(group)
+
+    return question
+
+
+_TOOL_PARAM_BUILDERS: Dict[str, Callable[[str, Dict[str, Any]], Dict[str, Any]]] = {
+    'web_search': lambda question, context: {
+        'query': question,
+        'max_results': 5,
+        'language': 'zh-CN'
+    },
+    'rag_retrieval': lambda question, context: {
+        'query': question,
+        'top_k': 10,
+        'threshold': 0.7
+    },
+    'calculator': lambda question, context: {
+        'expression': _extract_math_expression(question)
+    },
+    'translator': lambda question, context: {
+        'text': question,
+        'target_language': 'en' if '翻译' in question else 'zh'
+    }
+}
+
+_INPUT_DEPS: Dict[str, Tuple[str, ...]] = {
+    'calculator': ('web_search', 'rag_retrieval'),
+    'data_analyzer': ('web_search', 'rag_retrieval', 'file_manager'),
+    'code_executor': ('rag_retrieval',),
+    'translator': (),
+    'web_search': (),
+    'rag_retrieval': ()
+}
+
+_OUTPUT_DEPS: Dict[str, Tuple[str, ...]] = {
+    'web_search': ('calculator', 'data_analyzer'),
+    'rag_retrieval': ('calculator', 'data_analyzer', 'code_executor'),
+    'calculator': (),
+    'translator': (),
+    'data_analyzer': (),
+    'code_executor': ()
+}
+
 
 class ToolDependencyGraph:
     def __init__(self):
         self.nodes = {}
         self.edges = {}
+        self.in_degree: Dict[str, int] = {}
+        self.successors: Dict[str, List[str]] = {}
+        # dependents registered before the tool they wait on was added
+        self._waiting: Dict[str, List[str]] = {}
+        # longest expected downstream path per tool; ready tools with the longest chain go first
+        self.priorities: Dict[str, float] = {}
+        self._ready: Optional[List[Tuple[float, int, str]]] = None
+        self._ready_seq = itertools.count()
 
     def add_tool(self, tool: BaseTool, input_deps: List[str], output_deps: List[str]):
-        self.nodes[tool.name] = {
+        name = tool.name
+        is_new = name not in self.nodes
+        self.nodes[name] = {
             'tool': tool,
             'input_deps': input_deps,
             'output_deps': output_deps,
             'status': 'pending'
         }
-        self.edges[tool.name] = output_deps
+        self.edges[name] = output_deps
+        if not is_new:
+            return
+
+        self.in_degree[name] = 0
+        self.successors[name] = []
+        # deps that are not part of this graph count as satisfied
+        for dep in input_deps:
+            if dep in self.nodes:
+                self.successors[dep].append(name)
+                self.in_degree[name] += 1
+            else:
+                self._waiting.setdefault(dep, []).append(name)
+        for dependent in self._waiting.pop(name, ()):
+            self.successors[name].append(dependent)
+            self.in_degree[dependent] += 1
+        self._ready = None
+
+    def compute_priorities(self, execution_times: Dict[str, float]):
+        for tool_name in reversed(self.topological_sort()):
+            downstream = max((self.priorities.get(successor, 0.0) for successor in self.successors[tool_name]),
+                             default=0.0)
+            self.priorities[tool_name] = execution_times.get(tool_name, 1.0) + downstream
+        self._ready = None
 
     def get_ready_tools(self) -> List[str]:
+        # hands out each ready tool once, highest priority first; mark_completed queues the tools it unblocks
+        if self._ready is None:
+            self._ready = []
+            for name, degree in self.in_degree.items():
+                if degree == 0 and self.nodes[name]['status'] == 'pending':
+                    self._push_ready(name)
         ready = []
-        for tool_name, node in self.nodes.items():
-            if node['status'] == 'pending':
-                if all(self.nodes[dep]['status'] == 'completed' for dep in node['input_deps']):
-                    ready.append(tool_name)
+        while self._ready:
+            ready.append(heapq.heappop(self._ready)[2])
         return ready
 
-    def mark_completed(self, tool_name: str):
+    def _push_ready(self, tool_name: str):
+        heapq.heappush(self._ready, (-self.priorities.get(tool_name, 0.0), next(self._ready_seq), tool_name))
+
+    def mark_running(self, tool_name: str):
         if tool_name in self.nodes:
-            self.nodes[tool_name]['status'] = 'completed'
+            self.nodes[tool_name]['status'] = 'running'
+
+    def mark_completed(self, tool_name: str):
+        self._finish(tool_name, 'completed')
 
     def mark_failed(self, tool_name: str):
-        if tool_name in self.nodes:
-            self.nodes[tool_name]['status'] = 'failed'
+        # dependents still run, just without this tool's output
+        self._finish(tool_name, 'failed')
+
+    def _finish(self, tool_name: str, status: str):
+        node = self.nodes.get(tool_name)
+        if node is None or node['status'] in ('completed', 'failed'):
+            return
+        node['status'] = status
+        for successor in self.successors[tool_name]:
+            self.in_degree[successor] -= 1
+            # a tool forced through a cycle may already be running or done
+            if (self.in_degree[successor] == 0 and self._ready is not None
+                    and self.nodes[successor]['status'] == 'pending'):
+                self._push_ready(successor)
 
     def topological_sort(self) -> List[str]:
+        in_degree = dict(self.in_degree)
+        queue = deque(name for name, degree in in_degree.items() if degree == 0)
         result = []
-        temp_graph = {name: node['input_deps'].copy() for name, node in self.nodes.items()}
-
-        while temp_graph:
-            ready = [name for name, deps in temp_graph.items() if not deps]
-            if not ready:
-                remaining = list(temp_graph.keys())
-                return result + remaining
 
-            for tool_name in ready:
-                result.append(tool_name)
-                del temp_graph[tool_name]
+        while queue:
+            tool_name = queue.popleft()
+            result.append(tool_name)
+            for successor in self.successors[tool_name]:
+                in_degree[successor] -= 1
+                if in_degree[successor] == 0:
+                    queue.append(successor)
 
-                for remaining_tool, deps in temp_graph.items():
-                    if tool_name in deps:
-                        deps.remove(tool_name)
+        if len(result) < len(self.nodes):
+            placed = set(result)
+            result.extend(name for name in self.nodes if name not in placed)
 
         return result
 
 
-class ExecutionPlan:
-    def __init__(self):
-        self.stages = []
-
-    def add_stage(self, stage):
-        self.stages.append(stage)
-
-
-class ExecutionStage:
-    def __init__(self):
-        self.tasks = []
-
-    def add_task(self, task):
-        self.tasks.append(task)
-
-
 class ToolTask:
     def __init__(self, tool_name: str, tool: BaseTool, params: Dict[str, Any], context: Dict[str, Any]):
         self.tool_name = tool_name
@@ -86,6 +183,15 @@ class ToolTask:
         return self.status == 'completed' and self.error is None
 
 
+class ExecutionPlan:
+    def __init__(self, tool_graph: ToolDependencyGraph):
+        self.tool_graph = tool_graph
+        self.tasks: Dict[str, ToolTask] = {}
+
+    def add_task(self, task: ToolTask):
+        self.tasks[task.tool_name] = task
+
+
 class IntelligentToolOrchestrator:
     def __init__(self):
         self.tool_registry = ToolRegistry()
@@ -94,6 +200,9 @@ class IntelligentToolOrchestrator:
         self.result_integrator = ResultIntegrator()
         self.max_parallel_tools = 3
         self.default_timeout = 30.0
+        # (sorted tool names, registration version) -> {tool name: (input deps, output deps)}
+        self.plan_cache: OrderedDict = OrderedDict()
+        self.plan_cache_size = 256
 
     async def orchestrate_tools(self, question: str, tool_requirements: List[Dict[str, Any]],
                                 knowledge_context: Dict[str, Any]) -> Dict[str, Any]:
@@ -118,90 +227,98 @@ class IntelligentToolOrchestrator:
         return await self.orchestrate_tools(question, tool_requirements, knowledge_context)
 
     def analyze_tool_dependencies(self, tool_requirements: List[Dict[str, Any]], question: str) -> ToolDependencyGraph:
-        tool_graph = ToolDependencyGraph()
+        tool_names = [tool_spec['name'] for tool_spec in tool_requirements]
+        # dependency rules only look at tool names, so the question is not part of the key;
+        # the registration version drops shapes analysed before a tool was (un)registered
+        cache_key = (tuple(sorted(tool_names)), self.tool_registry.registration_version)
+        graph_shape = self.plan_cache.get(cache_key)
+        if graph_shape is not None:
+            self.plan_cache.move_to_end(cache_key)
+        else:
+            graph_shape = self._analyze_graph_shape(tool_requirements, question)
+            self.plan_cache[cache_key] = graph_shape
+            if len(self.plan_cache) > self.plan_cache_size:
+                self.plan_cache.popitem(last=False)
 
-        for tool_spec in tool_requirements:
-            tool_name = tool_spec['name']
+        # the graph is rebuilt in request order every call; execution mutates its state
+        tool_graph = ToolDependencyGraph()
+        for tool_name in tool_names:
             tool = self.tool_registry.get_tool(tool_name)
+            if tool and tool_name in graph_shape:
+                input_deps, output_deps = graph_shape[tool_name]
+                tool_graph.add_tool(tool, list(input_deps), list(output_deps))
 
+        # priorities follow live execution times, so they are not cached
+        tool_graph.compute_priorities({name: self._expected_execution_time(name) for name in tool_graph.nodes})
+        return tool_graph
+
+    def _analyze_graph_shape(self, tool_requirements: List[Dict[str, Any]],
+                             question: str) -> Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+        graph_shape = {}
+        for tool_spec in tool_requirements:
+            tool = self.tool_registry.get_tool(tool_spec['name'])
             if tool:
                 input_deps = self.dependency_analyzer.analyze_input_dependencies(tool, question)
                 output_deps = self.dependency_analyzer.analyze_output_dependencies(tool, tool_requirements)
-                tool_graph.add_tool(tool, input_deps, output_deps)
+                graph_shape[tool.name] = (tuple(input_deps), tuple(output_deps))
+        return graph_shape
 
-        return tool_graph
+    def _expected_execution_time(self, tool_name: str) -> float:
+        performance = self.tool_registry.get_tool_performance(tool_name)
+        if not performance['total_executions']:
+            return 1.0
+        return performance['average_execution_time']
 
     def generate_execution_plan(self, tool_graph: ToolDependencyGraph,
                                 knowledge_context: Dict[str, Any]) -> ExecutionPlan:
-        plan = ExecutionPlan()
-        execution_order = tool_graph.topological_sort()
-        parallel_groups = self._identify_parallel_groups(execution_order, tool_graph)
-
-        for group in parallel_groups:
-            stage = ExecutionStage()
-            for tool_name in group:
-                tool_node = tool_graph.nodes[tool_name]
-                task = self._create_tool_task(tool_node['tool'], knowledge_context)
-                stage.add_task(task)
-            plan.add_stage(stage)
+        plan = ExecutionPlan(tool_graph)
+        for tool_name in tool_graph.topological_sort():
+            plan.add_task(self._create_tool_task(tool_graph.nodes[tool_name]['tool'], knowledge_context))
 
         return plan
 
     async def execute_plan(self, execution_plan: ExecutionPlan) -> Dict[str, Any]:
+        tool_graph = execution_plan.tool_graph
+        semaphore = asyncio.Semaphore(self.max_parallel_tools)
         results = {}
+        running = {}
 
-        for stage in execution_plan.stages:
-            if len(stage.tasks) == 1:
-                task = stage.tasks[0]
-                result = await self._execute_tool_task(task)
-                results[task.tool_name] = result
-            else:
-                stage_tasks = [self._execute_tool_task(task) for task in stage.tasks]
-                stage_results = await asyncio.gather(*stage_tasks, return_exceptions=True)
+        def dispatch(tool_name: str):
+            task = execution_plan.tasks[tool_name]
+            tool_graph.mark_running(tool_name)
+            running[asyncio.create_task(self._execute_tool_task(task, semaphore))] = task
 
-                for task, result in zip(stage.tasks, stage_results):
+        try:
+            while True:
+                for tool_name in tool_graph.get_ready_tools():
+                    dispatch(tool_name)
+
+                if not running:
+                    # a dependency cycle leaves tools that never become ready; run them in plan order
+                    stalled = next((name for name in execution_plan.tasks
+                                    if tool_graph.nodes[name]['status'] == 'pending'), None)
+                    if stalled is None:
+                        break
+                    dispatch(stalled)
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    result = future.result()
                     results[task.tool_name] = result
-
-            failed_tasks = [task for task in stage.tasks if not task.is_successful()]
-            if failed_tasks:
-                retry_results = await self._handle_failed_tasks(failed_tasks)
-                results.update(retry_results)
+                    if result.get('success', False):
+                        tool_graph.mark_completed(task.tool_name)
+                    else:
+                        tool_graph.mark_failed(task.tool_name)
+        finally:
+            for future in running:
+                future.cancel()
 
         return results
 
     def integrate_results(self, execution_results: Dict[str, Any], question: str) -> Dict[str, Any]:
         return self.result_integrator.integrate_tool_results(execution_results, question)
 
-    def _identify_parallel_groups(self, execution_order: List[str], tool_graph: ToolDependencyGraph) -> List[List[str]]:
-        groups = []
-        remaining_tools = execution_order.copy()
-
-        while remaining_tools:
-            current_group = []
-            tools_to_remove = []
-
-            for tool_name in remaining_tools:
-                tool_node = tool_graph.nodes[tool_name]
-                dependencies_satisfied = all(
-                    dep not in remaining_tools for dep in tool_node['input_deps']
-                )
-
-                if dependencies_satisfied and len(current_group) < self.max_parallel_tools:
-                    current_group.append(tool_name)
-                    tools_to_remove.append(tool_name)
-
-            if not current_group and remaining_tools:
-                current_group.append(remaining_tools[0])
-                tools_to_remove.append(remaining_tools[0])
-
-            for tool_name in tools_to_remove:
-                remaining_tools.remove(tool_name)
-
-            if current_group:
-                groups.append(current_group)
-
-        return groups
-
     def _create_tool_task(self, tool: BaseTool, knowledge_context: Dict[str, Any]) -> ToolTask:
         params = self._generate_tool_params(tool.name, knowledge_context.get('question', ''), knowledge_context)
         return ToolTask(tool.name, tool, params, knowledge_context)
@@ -212,166 +329,79 @@ class IntelligentToolOrchestrator:
             'context': knowledge_context
         }
 
-        tool_specific_params = {
-            'web_search': {
-                'query': question,
-                'max_results': 5,
-                'language': 'zh-CN'
-            },
-            'rag_retrieval': {
-                'query': question,
-                'top_k': 10,
-                'threshold': 0.7
-            },
-            'calculator': {
-                'expression': self._extract_math_expression(question)
-            },
-            'translator': {
-                'text': question,
-                'target_language': 'en' if '翻译' in question else 'zh'
-            }
-        }
-
-        if tool_name in tool_specific_params:
-            base_params.update(tool_specific_params[tool_name])
+        builder = _TOOL_PARAM_BUILDERS.get(tool_name)
+        if builder is not None:
+            base_params.update(builder(question, knowledge_context))
 
         return base_params
 
-    async def _execute_tool_task(self, task: ToolTask) -> Dict[str, Any]:
-        start_time = time.time()
+    async def _execute_tool_task(self, task: ToolTask, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        task.status = 'running'
+        timeout = getattr(task.tool, 'timeout', self.default_timeout)
 
         try:
-            task.status = 'running'
-
             if not task.tool.validate_params(task.params):
                 raise ValueError(f"Invalid parameters for tool {task.tool_name}")
+        except Exception as e:
+            task.error = str(e)
+            task.status = 'failed'
+            self.tool_registry.update_tool_performance(task.tool_name, 0.0, False)
+            return {
+                'tool_name': task.tool_name,
+                'success': False,
+                'error': task.error,
+                'execution_time': 0.0
+            }
 
-            result = await asyncio.wait_for(
-                task.tool.execute(task.params),
-                timeout=getattr(task.tool, 'timeout', self.default_timeout)
-            )
+        max_retries = getattr(task.tool, 'retry_count', 0)
+        for attempt in range(max_retries + 1):
+            if attempt:
+                # back off outside the semaphore so other tools can use the slot
+                await asyncio.sleep(min(2 ** (attempt - 1), 10))
+
+            async with semaphore:
+                start_time = time.time()
+                try:
+                    result = await asyncio.wait_for(task.tool.execute(task.params), timeout=timeout)
+                except Exception as e:
+                    task.error = str(e)
+                    task.execution_time = time.time() - start_time
+                    self.tool_registry.update_tool_performance(task.tool_name, task.execution_time, False)
+                    continue
 
             task.result = result
+            task.error = None
             task.status = 'completed'
             task.execution_time = time.time() - start_time
-
             self.tool_registry.update_tool_performance(task.tool_name, task.execution_time, True)
 
-            return {
+            response = {
                 'tool_name': task.tool_name,
                 'success': True,
                 'result': result,
                 'execution_time': task.execution_time
             }
+            if attempt:
+                response['retry_attempt'] = attempt
+            return response
 
-        except Exception as e:
-            task.error = str(e)
-            task.status = 'failed'
-            task.execution_time = time.time() - start_time
-
-            self.tool_registry.update_tool_performance(task.tool_name, task.execution_time, False)
-
-            return {
-                'tool_name': task.tool_name,
-                'success': False,
-                'error': str(e),
-                'execution_time': task.execution_time
-            }
-
-    async def _handle_failed_tasks(self, failed_tasks: List[ToolTask]) -> Dict[str, Any]:
-        retry_results = {}
-
-        for task in failed_tasks:
-            if hasattr(task.tool, 'retry_count') and task.tool.retry_count > 0:
-                retry_result = await self._retry_tool_task(task)
-                retry_results[task.tool_name] = retry_result
-            else:
-                retry_results[task.tool_name] = {
-                    'tool_name': task.tool_name,
-                    'success': False,
-                    'error': task.error,
-                    'retry_attempted': False
-                }
-
-        return retry_results
-
-    async def _retry_tool_task(self, task: ToolTask) -> Dict[str, Any]:
-        max_retries = getattr(task.tool, 'retry_count', 1)
-
-        for attempt in range(max_retries):
-            try:
-                await asyncio.sleep(min(2 ** attempt, 10))
-
-                result = await asyncio.wait_for(
-                    task.tool.execute(task.params),
-                    timeout=getattr(task.tool, 'timeout', self.default_timeout)
-                )
-
-                return {
-                    'tool_name': task.tool_name,
-                    'success': True,
-                    'result': result,
-                    'retry_attempt': attempt + 1
-                }
-
-            except Exception as e:
-                if attempt == max_retries - 1:
-                    return {
-                        'tool_name': task.tool_name,
-                        'success': False,
-                        'error': str(e),
-                        'retry_attempts': max_retries
-                    }
-
+        task.status = 'failed'
         return {
             'tool_name': task.tool_name,
             'success': False,
-            'error': 'Max retries exceeded'
+            'error': task.error,
+            'execution_time': task.execution_time,
+            'retry_attempts': max_retries
         }
 
-    def _extract_math_expression(self, question: str) -> str:
-        import re
-        math_patterns = [
-            r'(\d+(?:\.\d+)?)\s*[\+\-\*\/]\s*(\d+(?:\.\d+)?)',
-            r'计算\s*(.+)',
-            r'求\s*(.+)',
-        ]
-
-        for pattern in math_patterns:
-            match = re.search(pattern, question)
-            if match:
-                return match.group(1) if 'calculate' in pattern or '计算' in pattern else match.group(0)
-
-        return question
-
 
 class ToolDependencyAnalyzer:
     def analyze_input_dependencies(self, tool: BaseTool, question: str) -> List[str]:
-        dependency_rules = {
-            'calculator': ['web_search', 'rag_retrieval'],
-            'data_analyzer': ['web_search', 'rag_retrieval', 'file_manager'],
-            'code_executor': ['rag_retrieval'],
-            'translator': [],
-            'web_search': [],
-            'rag_retrieval': []
-        }
-
-        return dependency_rules.get(tool.name, [])
+        return list(_INPUT_DEPS.get(tool.name, ()))
 
     def analyze_output_dependencies(self, tool: BaseTool, tool_requirements: List[Dict[str, Any]]) -> List[str]:
-        other_tools = [req['name'] for req in tool_requirements if req['name'] != tool.name]
-
-        output_rules = {
-            'web_search': ['calculator', 'data_analyzer'],
-            'rag_retrieval': ['calculator', 'data_analyzer', 'code_executor'],
-            'calculator': [],
-            'translator': [],
-            'data_analyzer': [],
-            'code_executor': []
-        }
-
-        potential_outputs = output_rules.get(tool.name, [])
-        return [tool_name for tool_name in potential_outputs if tool_name in other_tools]
+        other_tools = {req['name'] for req in tool_requirements if req['name'] != tool.name}
+        return [tool_name for tool_name in _OUTPUT_DEPS.get(tool.name, ()) if tool_name in other_tools]
 
 
 class ExecutionPlanner:
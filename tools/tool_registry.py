@@ -1,7 +1,26 @@
 import asyncio
-from typing import Dict, Any, List, Optional, Callable
+import re
+from collections import Counter, deque
+from typing import Dict, Any, List, Optional, Callable, Set, Pattern
 from abc import ABC, abstractmethod
 
+RECOMMENDATION_KEYWORDS = {
+    "web_search": ("搜索", "查找", "最新", "新闻", "信息"),
+    "rag_retrieval": ("知识库", "文档", "资料", "参考"),
+    "calculator": ("计算", "数学", "公式", "数字"),
+    "translator": ("翻译", "英文", "中文", "语言")
+}
+
+_RECOMMENDATION_ORDER = {tool_name: i for i, tool_name in enumerate(RECOMMENDATION_KEYWORDS)}
+
+TOOL_CATEGORY_PATTERNS = {
+    "search": ("web_search", "rag_retrieval"),
+    "computation": ("calculator", "data_analyzer"),
+    "communication": ("translator", "summarizer"),
+    "file": ("file_manager", "document_processor"),
+    "api": ("api_client", "webhook")
+}
+
 
 class BaseTool(ABC):
     def __init__(self, name: str, description: str, version: str = "1.0"):
@@ -21,6 +40,9 @@ class BaseTool(ABC):
     def validate_params(self, params: Dict[str, Any]) -> bool:
         pass
 
+    async def close(self):
+        pass
+
     def get_schema(self) -> Dict[str, Any]:
         return {
             "name": self.name,
@@ -37,6 +59,13 @@ class ToolRegistry:
         self._tool_categories = {}
         self._tool_dependencies = {}
         self._tool_performance = {}
+        # values are dicts used as insertion-ordered sets, keeping tools in registration order
+        self._capability_index: Dict[str, Dict[str, None]] = {}
+        self._keyword_index: Dict[str, Dict[str, None]] = {}
+        self._keyword_pattern: Optional[Pattern] = None
+        # bumped on every (un)registration so callers can invalidate derived caches
+        self.registration_version = 0
+        self._closing_tasks: Set[asyncio.Task] = set()
         self._initialize_default_tools()
 
     def _initialize_default_tools(self):
@@ -59,17 +88,26 @@ class ToolRegistry:
         if not isinstance(tool, BaseTool):
             return False
 
+        previous = self._tools.get(tool.name)
+        if previous is not None:
+            self._remove_from_indexes(tool.name)
+            if previous is not tool:
+                self._close_tool(previous)
         self._tools[tool.name] = tool
+        self._update_indexes(tool)
         self._update_tool_categories(tool)
         self._update_dependencies(tool)
         self._initialize_performance_tracking(tool)
+        self.registration_version += 1
 
         return True
 
     def unregister_tool(self, tool_name: str) -> bool:
         if tool_name in self._tools:
-            del self._tools[tool_name]
+            tool = self._tools.pop(tool_name)
             self._cleanup_tool_data(tool_name)
+            self._close_tool(tool)
+            self.registration_version += 1
             return True
         return False
 
@@ -82,11 +120,7 @@ class ToolRegistry:
         return list(self._tools.keys())
 
     def find_tools_by_capability(self, capability: str) -> List[str]:
-        matching_tools = []
-        for tool_name, tool in self._tools.items():
-            if capability in tool.capabilities:
-                matching_tools.append(tool_name)
-        return matching_tools
+        return list(self._capability_index.get(capability, ()))
 
     def get_tool_dependencies(self, tool_name: str) -> List[str]:
         return self._tool_dependencies.get(tool_name, [])
@@ -142,24 +176,51 @@ class ToolRegistry:
         perf["success_rate"] = (perf["total_executions"] - perf["error_count"]) / perf["total_executions"]
 
     def get_recommended_tools(self, task_description: str, context: Dict[str, Any]) -> List[str]:
-        task_lower = task_description.lower()
-        recommended = []
-
-        tool_keywords = {
-            "web_search": ["搜索", "查找", "最新", "新闻", "信息"],
-            "rag_retrieval": ["知识库", "文档", "资料", "参考"],
-            "calculator": ["计算", "数学", "公式", "数字"],
-            "translator": ["翻译", "英文", "中文", "语言"]
-        }
-
-        for tool_name, keywords in tool_keywords.items():
-            if tool_name in self._tools:
-                score = sum(1 for keyword in keywords if keyword in task_lower)
-                if score > 0:
-                    recommended.append((tool_name, score))
-
-        recommended.sort(key=lambda x: x[1], reverse=True)
-        return [tool_name for tool_name, score in recommended]
+        pattern = self._get_keyword_pattern()
+        if pattern is None:
+            return []
+
+        # each distinct keyword found scores one point for every tool it belongs to
+        matched_keywords = set(pattern.findall(task_description.lower()))
+        scores = Counter(tool_name for keyword in matched_keywords for tool_name in self._keyword_index[keyword])
+
+        return sorted(scores, key=lambda tool_name: (-scores[tool_name], _RECOMMENDATION_ORDER[tool_name]))
+
+    def _get_keyword_pattern(self) -> Optional[Pattern]:
+        if self._keyword_pattern is None and self._keyword_index:
+            # lookahead so keywords that overlap in the text are all found in one pass
+            alternatives = '|'.join(map(re.escape, sorted(self._keyword_index, key=lambda k: (-len(k), k))))
+            self._keyword_pattern = re.compile(f'(?=({alternatives}))')
+        return self._keyword_pattern
+
+    def _close_tool(self, tool: BaseTool):
+        # most tools keep BaseTool's no-op close; don't spin up an event loop for them
+        if type(tool).close is BaseTool.close:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(tool.close())
+            return
+        # hold a reference until the close finishes so the task is not collected mid-flight
+        task = loop.create_task(tool.close())
+        self._closing_tasks.add(task)
+        task.add_done_callback(self._closing_tasks.discard)
+
+    def _update_indexes(self, tool: BaseTool):
+        for capability in tool.capabilities:
+            self._capability_index.setdefault(capability, {})[tool.name] = None
+        for keyword in RECOMMENDATION_KEYWORDS.get(tool.name, ()):
+            self._keyword_index.setdefault(keyword, {})[tool.name] = None
+        self._keyword_pattern = None
+
+    def _remove_from_indexes(self, tool_name: str):
+        for index in (self._capability_index, self._keyword_index):
+            for key in [key for key, tool_names in index.items() if tool_name in tool_names]:
+                del index[key][tool_name]
+                if not index[key]:
+                    del index[key]
+        self._keyword_pattern = None
 
     def _update_tool_categories(self, tool: BaseTool):
         category = self._determine_tool_category(tool)
@@ -169,16 +230,9 @@ class ToolRegistry:
             self._tool_categories[category].append(tool.name)
 
     def _determine_tool_category(self, tool: BaseTool) -> str:
-        category_mapping = {
-            "search": ["web_search", "rag_retrieval"],
-            "computation": ["calculator", "data_analyzer"],
-            "communication": ["translator", "summarizer"],
-            "file": ["file_manager", "document_processor"],
-            "api": ["api_client", "webhook"]
-        }
-
-        for category, tool_patterns in category_mapping.items():
-            if any(pattern in tool.name.lower() for pattern in tool_patterns):
+        tool_name = tool.name.lower()
+        for category, tool_patterns in TOOL_CATEGORY_PATTERNS.items():
+            if any(pattern in tool_name for pattern in tool_patterns):
                 return category
 
         return "general"
@@ -198,6 +252,8 @@ class ToolRegistry:
         }
 
     def _cleanup_tool_data(self, tool_name: str):
+        self._remove_from_indexes(tool_name)
+
         for category, tools in self._tool_categories.items():
             if tool_name in tools:
                 tools.remove(tool_name)
@@ -218,29 +274,30 @@ class ToolRegistry:
 
     def _detect_circular_dependencies(self, graph: Dict[str, List[str]]) -> List[List[str]]:
         visited = set()
-        rec_stack = set()
         cycles = []
 
-        def dfs(node, path):
-            if node in rec_stack:
-                cycle_start = path.index(node)
-                cycles.append(path[cycle_start:] + [node])
-                return
-
-            if node in visited:
-                return
-
-            visited.add(node)
-            rec_stack.add(node)
-
-            for neighbor in graph.get(node, []):
-                dfs(neighbor, path + [node])
-
-            rec_stack.remove(node)
-
-        for node in graph:
-            if node not in visited:
-                dfs(node, [])
+        for root in graph:
+            if root in visited:
+                continue
+
+            visited.add(root)
+            path = [root]
+            # position of each node on the current path, i.e. the recursion stack
+            path_index = {root: 0}
+            stack = [iter(graph.get(root, []))]
+
+            while stack:
+                neighbor = next(stack[-1], None)
+                if neighbor is None:
+                    stack.pop()
+                    del path_index[path.pop()]
+                elif neighbor in path_index:
+                    cycles.append(path[path_index[neighbor]:] + [neighbor])
+                elif neighbor not in visited:
+                    visited.add(neighbor)
+                    path_index[neighbor] = len(path)
+                    path.append(neighbor)
+                    stack.append(iter(graph.get(neighbor, [])))
 
         return cycles
 
@@ -251,11 +308,11 @@ class ToolRegistry:
             for neighbor in graph[node]:
                 in_degree[neighbor] += 1
 
-        queue = [node for node in in_degree if in_degree[node] == 0]
+        queue = deque(node for node in in_degree if in_degree[node] == 0)
         result = []
 
         while queue:
-            node = queue.pop(0)
+            node = queue.popleft()
             result.append(node)
 
             for neighbor in graph.get(node, []):